@@ -1,17 +1,31 @@
-from copy import deepcopy
+from argparse import ArgumentParser
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
-from json import load, loads, dumps, JSONDecodeError
+from heapq import heapify, heappush, heappop
+from gc import collect
+from hashlib import sha1
+from io import BytesIO, TextIOWrapper
+from json import load, loads, dumps, JSONDecodeError, JSONDecoder
 from math import ceil
-from os import path, walk, listdir, remove
+from platform import node
+from os import path, walk, listdir, remove, replace, makedirs, stat, cpu_count, sep
 from os.path import join, isfile, dirname, isdir, exists, basename, abspath
-from random import random, shuffle, choice
+from pickle import dump as dump_pickle, load as load_pickle, UnpicklingError
+from random import Random, getrandbits
+from sqlite3 import connect
 from subprocess import Popen
-from sys import version_info, executable
-from threading import Thread
-from time import sleep
+from sys import version_info, executable, intern, getsizeof
+from threading import Thread, current_thread, get_ident
+from time import sleep, perf_counter, time as current_time
+from tracemalloc import start as start_tracing, stop as stop_tracing, get_traced_memory
 from tkinter import Tk, X, Y, E, W, CENTER, LEFT, BOTH, RIGHT, Text, StringVar, Event, TOP, FLAT, INSERT, Text, Entry
 from tkinter.scrolledtext import ScrolledText
 from tkinter.ttk import Label, Frame, Style
+from weakref import WeakKeyDictionary
+from zipfile import ZipFile
 # MORE REQUIREMENTS BELOW
 
 ##################################################################### CONSTANTS
@@ -74,6 +88,57 @@ PATH_EXPLAINATIONS = join(CURRENT_DIRECTORY, "assets", "explainations")
 PATH_PROFILES = join(CURRENT_DIRECTORY, "assets", "profiles")
 PATH_SOUNDS = join(CURRENT_DIRECTORY, "assets", "sounds")
 PATH_TEMPORARY_FILES = join(CURRENT_DIRECTORY, "assets", "temp")
+PATH_CACHE = join(CURRENT_DIRECTORY, "assets", "cache")
+
+# CATALOG
+USE_CATALOG = True # Compile the lessons into a single indexed file, rebuilt only when a lesson file changes
+FILE_CATALOG = "catalog.db"
+CATALOG_VERSION = 3 # Increase it when the tables change to rebuild the existing catalogs
+LAZY_LOADING = True # Load only the lessons headers at startup, and their questions when they are needed
+
+# SNAPSHOT
+USE_SNAPSHOT = True # Save the loaded lessons in a single file, read back at the next launch if no lesson file changed
+FILE_SNAPSHOT = "snapshot.pickle"
+SNAPSHOT_VERSION = 4 # Increase it when the records change to ignore the existing snapshots
+
+# LOADING
+PARALLEL_LOADING = True # Parse the lessons files in several processes
+PARALLEL_LOADING_THRESHOLD = 64 # Under this number of lessons files, starting the processes costs more than it saves
+LOADING_WORKERS = cpu_count()
+
+COLUMNAR_THRESHOLD = 10000 # Lessons with more questions store them in columns, and create the Question objects on demand
+STREAMING_THRESHOLD = 4 * 1024 * 1024 # Lessons files bigger than this number of bytes are parsed one question at a time
+STREAMING_CHUNK_SIZE = 64 * 1024
+RESIDENT_LESSONS = 64 # Only the questions of the most recently used lessons stay in memory (0 for no limit), the others are loaded again when needed
+
+# HOT RELOAD
+HOT_RELOAD = True # Watch the lessons and explainations files, and reload the modified ones without restarting
+HOT_RELOAD_INTERVAL = 2000 # milliseconds
+
+# PROFILES
+DEVICE = node() or "device" # Each device counts its own answers, so the profiles of several devices can be merged
+LEGACY_DEVICE = "legacy" # The answers saved before the counters by device
+
+# SELECTION
+MODE_SAMPLER = "sampler" # The questions are drawn at random, the well known ones less often
+MODE_SPACED_REPETITION = "spaced-repetition" # The question whose review is the most overdue is asked first
+SELECTION_MODE = MODE_SAMPLER # Chosen by each profile
+DEFAULT_RANDOM = Random() # Used by the schedulers when they are not given the generator of a profile
+BATCH_SAMPLING_THRESHOLD = 4 # From this number of questions planned at once, they are drawn together with NumPy when it is installed
+RELEARNING_DELAY = 60 # seconds before a wrong answer is asked again in spaced repetition
+DEFAULT_EASE = 2.5
+MINIMAL_EASE = 1.3
+
+# SESSION
+PLANNED_QUESTIONS = 8 # The next questions of a lesson are planned ahead, so their speech and explainations can be prepared before they are asked
+PLAN_REFILL = 4 # The plan is topped up once only this number of questions is left in it, so the next ones are drawn together
+PREFETCH_SPEECH = True # Generate the speech of the planned questions in the background
+
+# SIMULATION
+SIMULATION_QUESTIONS = 2000 # Questions of the synthetic lesson answered by the simulated learners
+SIMULATION_SKILL = 0.8 # Chance of a simulated learner to answer right, shaped by its accuracy model
+SIMULATED_ANSWER_TIME = 10 # seconds taken by a simulated learner to answer, for the spaced repetition
+SIMULATION_BATCH = 64 # Questions planned at once by the batched runs of the sampler, drawn together with NumPy when it is installed
 
 # ICONS
 DEFAULT_ICON = "rabbit-pink"
@@ -122,6 +187,12 @@ while not import_successful:
             exit()
     import_successful = True
 
+# IMPORT OPTIONAL REQUIREMENTS
+try:
+    import numpy # Only needed by the dashboard and the batch sampling
+except ImportError:
+    numpy = None
+
 ###################################################################### WRAPPERS
 
 def log_calls(method):
@@ -131,15 +202,218 @@ def log_calls(method):
         return method(*args, **kwargs)
     return wrapper
 
+####################################################################### READERS
+
+def find_files(parent, extension=None):
+    files_list = []
+    for subdir, _, files in walk(parent):
+        if extension:
+            files_list += [join(subdir, f) for f in files if f.endswith(extension)]
+        else:
+            files_list += [join(subdir, f) for f in files]
+    return files_list
+
+# The files inside a pack are named after the path of the pack: "categories/pack.zip/animals/farm-animals.json"
+OPENED_PACKS = {}
+
+def open_pack(pack_path):
+    mtime = stat(pack_path).st_mtime_ns
+    if (pack_path not in OPENED_PACKS.keys()) or (OPENED_PACKS[pack_path][0] != mtime):
+        # The previous version is closed, an opened archive stays locked on Windows
+        if pack_path in OPENED_PACKS.keys():
+            OPENED_PACKS[pack_path][1].close()
+        # Opening the archive only reads its central directory, the members are decompressed when they are read
+        OPENED_PACKS[pack_path] = (mtime, ZipFile(pack_path))
+    return OPENED_PACKS[pack_path][1]
+
+def split_source(source):
+    index = source.find(".zip" + sep)
+    if index < 0:
+        return source, None
+    return source[:index + 4], source[index + 5:].replace(sep, "/")
+
+def find_pack_files(parent, extension=None):
+    files_list = []
+    for pack_path in find_files(parent, ".zip"):
+        for member in open_pack(pack_path).namelist():
+            if (not member.endswith("/")) and ((not extension) or member.endswith(extension)):
+                files_list.append(join(pack_path, *member.split("/")))
+    return files_list
+
+def find_lessons(parent):
+    return sorted(find_files(parent, ".json") + find_pack_files(parent, ".json"))
+
+def get_mtime(source):
+    pack_path, member = split_source(source)
+    return stat(pack_path).st_mtime_ns
+
+def hash_source(source):
+    pack_path, member = split_source(source)
+    if member:
+        return f'{open_pack(pack_path).getinfo(member).CRC:08x}'
+    with open(source, 'rb') as file:
+        return sha1(file.read()).hexdigest()
+
+def stamp_source(source):
+    # The CRC of a pack member is read from the central directory, and changes only when the member changes
+    pack_path, member = split_source(source)
+    return hash_source(source) if member else get_mtime(source)
+
+def size_source(source):
+    pack_path, member = split_source(source)
+    if member:
+        return open_pack(pack_path).getinfo(member).file_size
+    return stat(source).st_size
+
+def read_source(source):
+    pack_path, member = split_source(source)
+    if member:
+        return open_pack(pack_path).read(member)
+    with open(source, 'rb') as file:
+        return file.read()
+
+def open_source(source):
+    pack_path, member = split_source(source)
+    if member:
+        return TextIOWrapper(open_pack(pack_path).open(member), encoding=FILES_ENCODING)
+    return open(source, 'r', encoding=FILES_ENCODING)
+
+def stream_lesson(source):
+    with open_source(source) as file:
+        reader = JsonReader(file, STREAMING_CHUNK_SIZE)
+        for key in reader.keys():
+            if key == "questions":
+                for uid in reader.keys():
+                    yield key, (uid, reader.decode())
+            else:
+                yield key, reader.decode()
+
+def stream_questions(source):
+    for key, value in stream_lesson(source):
+        if key == "questions":
+            yield value
+
+def read_lesson(file_path, headers_only=False, critical=True):
+    try:
+        if size_source(file_path) > STREAMING_THRESHOLD:
+            # Only the headers are kept, the questions are read again one at a time when they are iterated
+            json_content = {}
+            for key, value in stream_lesson(file_path):
+                if key != "questions":
+                    json_content[key] = value
+                if all(key in json_content.keys() for key in ["id", "name", "icon", "prerequisites"]):
+                    break
+            questions = stream_questions(file_path)
+        else:
+            json_content = loads(read_source(file_path).decode(FILES_ENCODING))
+            questions = list(json_content["questions"].items())
+    except JSONDecodeError:
+        print(f"Error decoding JSON in {file_path}")
+        if critical:
+            exit()
+        return None
+    return {
+        "source": file_path,
+        "category": basename(dirname(file_path)).removesuffix(".zip"),
+        "uid": json_content["id"],
+        "name": json_content["name"],
+        "icon": json_content["icon"],
+        "prerequisites": json_content["prerequisites"],
+        # The languages of a streamed lesson are only known once its questions are read
+        "languages": sorted({name for _, languages in questions for name in languages.keys()}) if isinstance(questions, list) else None,
+        "count": len(questions) if isinstance(questions, list) else None,
+        # The ids of the questions place the stats of a lesson known by its headers only
+        "uids": [uid for uid, _ in questions] if headers_only and isinstance(questions, list) else None,
+        "questions": [] if headers_only else questions
+    }
+
+def read_lessons(file_paths, headers_only=False, critical=True):
+    if (not PARALLEL_LOADING) or (len(file_paths) < PARALLEL_LOADING_THRESHOLD):
+        for file_path in file_paths:
+            yield read_lesson(file_path, headers_only, critical)
+        return
+    # The streamed lessons cannot be sent back by the workers, they are read in this process
+    streamed_files = {file_path for file_path in file_paths if size_source(file_path) > STREAMING_THRESHOLD}
+    parsed_files = [file_path for file_path in file_paths if file_path not in streamed_files]
+    # The results are yielded in the order of the files, whatever the order the workers finish in
+    chunksize = ceil(len(parsed_files) / (LOADING_WORKERS * 4)) or 1
+    with ProcessPoolExecutor(LOADING_WORKERS) as executor:
+        records = executor.map(partial(read_lesson, headers_only=headers_only, critical=critical), parsed_files, chunksize=chunksize)
+        for file_path in file_paths:
+            if file_path in streamed_files:
+                yield read_lesson(file_path, headers_only, critical)
+            else:
+                yield next(records)
+
+# The stats of a profile are stored by pair of languages: {"english>french": {category: {lesson: {question: {device: [correct, tries]}}}}}
+def join_pair(spoken_language, learned_language):
+    return f"{spoken_language}>{learned_language}"
+
+def split_pair(pair_key):
+    return tuple(pair_key.split(">", 1))
+
+def create_counters(success, tries):
+    return [round(success * tries), tries]
+
+def read_profile_stats(profile, languages):
+    profile_stats = profile.get("stats", {})
+    saved_pairs = set(profile_stats.keys())
+    # The stats saved by pair before the counters by device are a success rate and a number of tries
+    for categories_stats in profile_stats.values():
+        for lessons_stats in categories_stats.values():
+            for questions_stats in lessons_stats.values():
+                for question_uid, counters in questions_stats.items():
+                    if isinstance(counters, list):
+                        questions_stats[question_uid] = {LEGACY_DEVICE: create_counters(*counters)}
+    # The profiles saved before the pairs of languages have their stats by learned language only, they are used for every spoken language
+    for category_uid, lessons in profile.get("categories", {}).items():
+        for lesson_uid, questions in lessons.items():
+            for question_uid, question_languages in questions.items():
+                for learned_language, values in question_languages.items():
+                    if values.get("tries", 0) == 0:
+                        continue
+                    for spoken_language in languages:
+                        pair_key = join_pair(spoken_language, learned_language)
+                        if (spoken_language == learned_language) or (pair_key in saved_pairs):
+                            continue
+                        questions_stats = profile_stats.setdefault(pair_key, {}).setdefault(category_uid, {}).setdefault(lesson_uid, {})
+                        questions_stats[question_uid] = {LEGACY_DEVICE: create_counters(values.get("success", 0), values["tries"])}
+    return profile_stats
+
+def merge_stats(merged_stats, profile_stats):
+    # A device only increases its own counters, so its highest counters are its latest ones
+    for pair_key, categories_stats in profile_stats.items():
+        for category_uid, lessons_stats in categories_stats.items():
+            for lesson_uid, questions_stats in lessons_stats.items():
+                merged_questions = merged_stats.setdefault(pair_key, {}).setdefault(category_uid, {}).setdefault(lesson_uid, {})
+                for question_uid, devices in questions_stats.items():
+                    merged_devices = merged_questions.setdefault(question_uid, {})
+                    for device, (correct, tries) in devices.items():
+                        merged_correct, merged_tries = merged_devices.get(device, (0, 0))
+                        merged_devices[device] = [max(correct, merged_correct), max(tries, merged_tries)]
+    return merged_stats
+
+# The schedule of a profile is stored like its stats: {"english>french": {category: {lesson: {question: [interval, ease, due]}}}}
+def merge_schedule(merged_schedule, profile_schedule):
+    # The latest due is the one of the latest review
+    for pair_key, categories_schedule in profile_schedule.items():
+        for category_uid, lessons_schedule in categories_schedule.items():
+            for lesson_uid, questions_schedule in lessons_schedule.items():
+                merged_questions = merged_schedule.setdefault(pair_key, {}).setdefault(category_uid, {}).setdefault(lesson_uid, {})
+                for question_uid, entry in questions_schedule.items():
+                    if (question_uid not in merged_questions) or (merged_questions[question_uid][2] < entry[2]):
+                        merged_questions[question_uid] = entry
+    return merged_schedule
+
 ####################################################################### CLASSES
 
 class Language:
-    def __init__(self, name=None, sentence=None, hints=None, success=0, tries=0):
+    __slots__ = ["_name", "_sentence", "_hints"]
+
+    def __init__(self, name=None, sentence=None, hints=None):
         self._name = name
         self._sentence = sentence
         self._hints = hints
-        self._success = success
-        self._tries = tries
 
     ################################################################### GETTERS
     @property
@@ -156,16 +430,6 @@ class Language:
     def hints(self):
         return self._hints
 
-    # Getter for success
-    @property
-    def success(self):
-        return self._success
-
-    # Getter for tries
-    @property
-    def tries(self):
-        return self._tries
-
     ################################################################### SETTERS
 
     # Setter for name
@@ -183,26 +447,15 @@ class Language:
     def hints(self, hints):
         self._hints = hints
 
-    # Setter for success
-    @success.setter
-    def success(self, success):
-        self._success = success
-
-    # Setter for tries
-    @tries.setter
-    def tries(self, tries):
-        self._tries = tries
-
 
 class Question:
+    __slots__ = ["_uid", "_languages", "_lesson", "_position"]
+
     def __init__(self, uid=None, languages=None):
         self._uid = uid
         self._languages = languages if languages else {}
-        self._sentence = None
-        self._answer = None
-        self._hints = None
-        self._success = None
-        self._tries = None
+        self._lesson = None
+        self._position = None
 
     ################################################################### GETTERS
 
@@ -214,6 +467,14 @@ class Question:
     def languages(self):
         return self._languages
 
+    @property
+    def lesson(self):
+        return self._lesson
+
+    @property
+    def position(self):
+        return self._position
+
     @property
     def sentence(self):
         return self.languages[SPOKEN_LANGUAGE].sentence
@@ -226,13 +487,14 @@ class Question:
     def hints(self):
         return self.languages[SPOKEN_LANGUAGE].hints
 
+    # The stats are stored by the lesson, for the current pair of languages
     @property
     def success(self):
-        return self.languages[LEARNED_LANGUAGE].success
+        return self.lesson.stats.success(self.position)
 
     @property
     def tries(self):
-        return self.languages[LEARNED_LANGUAGE].tries
+        return self.lesson.stats.tries(self.position)
 
 
     ################################################################### SETTERS
@@ -245,13 +507,13 @@ class Question:
     def languages(self, languages):
         self._languages = languages
 
-    @tries.setter
-    def tries(self, tries):
-        self.languages[LEARNED_LANGUAGE].tries = tries
+    @lesson.setter
+    def lesson(self, lesson):
+        self._lesson = lesson
 
-    @success.setter
-    def success(self, success):
-        self.languages[LEARNED_LANGUAGE].success = success
+    @position.setter
+    def position(self, position):
+        self._position = position
 
     ################################################################### METHODS
 
@@ -259,28 +521,478 @@ class Question:
         self._languages[language.name] = language
 
     def propose(self, response):
-        self.tries += 1
         correct = (response.lower().strip() == self.answer.lower().strip())
-        if correct:
-            self.success = ((self.success * (self.tries -1)) +1) / self.tries
-        else:
-            self.success = (self.success * (self.tries -1)) / self.tries
+        self.lesson.stats.answer(self.position, correct)
         return correct
 
 
+class LanguageView:
+    __slots__ = ["_table", "_name", "_position"]
+
+    def __init__(self, table=None, name=None, position=None):
+        self._table = table
+        self._name = name
+        self._position = position
+
+    ################################################################### GETTERS
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def sentence(self):
+        return self._table.sentences[self._name][self._position]
+
+    @property
+    def hints(self):
+        return self._table.hints[self._name][self._position]
+
+    ################################################################### SETTERS
+
+    @sentence.setter
+    def sentence(self, sentence):
+        self._table.sentences[self._name][self._position] = sentence
+
+    @hints.setter
+    def hints(self, hints):
+        self._table.hints[self._name][self._position] = hints
+
+
+class QuestionView(Question):
+    __slots__ = ["_table"]
+
+    def __init__(self, table=None, position=None):
+        super().__init__(table.uids[position])
+        self._table = table
+        self._lesson = table.lesson
+        self._position = position
+
+    ################################################################### GETTERS
+
+    @property
+    def languages(self):
+        return {name: LanguageView(self._table, name, self._position) for name, sentences in self._table.sentences.items() if sentences[self._position] is not None}
+
+
+class QuestionTable:
+    __slots__ = ["_uids", "_positions", "_sentences", "_hints", "_lesson"]
+
+    def __init__(self, questions=None, lesson=None):
+        self._uids = []
+        self._positions = {}
+        self._sentences = {}
+        self._hints = {}
+        self._lesson = lesson
+        for question in questions if questions else []:
+            self[question.uid] = question
+
+    ################################################################### GETTERS
+
+    @property
+    def uids(self):
+        return self._uids
+
+    @property
+    def sentences(self):
+        return self._sentences
+
+    @property
+    def hints(self):
+        return self._hints
+
+    @property
+    def lesson(self):
+        return self._lesson
+
+    @property
+    def languages(self):
+        return list(self._sentences.keys())
+
+    ################################################################### METHODS
+
+    def add_language(self, name):
+        count = len(self._uids)
+        self._sentences[name] = [None] * count
+        self._hints[name] = [None] * count
+
+    def view(self, position):
+        return QuestionView(self, position)
+
+    def position(self, uid):
+        return self._positions[uid]
+
+    def __setitem__(self, uid, question):
+        if uid not in self._positions.keys():
+            self._positions[uid] = len(self._uids)
+            self._uids.append(uid)
+            for name in self._sentences.keys():
+                self._sentences[name].append(None)
+                self._hints[name].append(None)
+        position = self._positions[uid]
+        for name, language in question.languages.items():
+            if name not in self._sentences.keys():
+                self.add_language(name)
+            self._sentences[name][position] = language.sentence
+            self._hints[name][position] = language.hints
+
+    def __getitem__(self, uid):
+        return self.view(self._positions[uid])
+
+    def __contains__(self, uid):
+        return uid in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._uids)
+
+    def get(self, uid, default=None):
+        return self[uid] if uid in self._positions else default
+
+    def keys(self):
+        return self._positions.keys()
+
+    def values(self):
+        return (self.view(position) for position in range(len(self._uids)))
+
+    def items(self):
+        return ((uid, self.view(position)) for position, uid in enumerate(self._uids))
+
+
+class WeightedSampler:
+    __slots__ = ["_weights", "_tree"]
+    # The NumPy generator of each generator is seeded once by it, so a profile draws the same questions again
+    numpy_generators = WeakKeyDictionary()
+
+    def __init__(self, weights=None):
+        # Fenwick tree: each node holds the sum of the weights of a range of positions, so a draw or an update reads log(n) nodes
+        self._weights = array("d", weights if weights else [])
+        self._tree = array("d", [0]) * (len(self._weights) + 1)
+        for index, weight in enumerate(self._weights, start=1):
+            self._tree[index] += weight
+            parent = index + (index & -index)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[index]
+
+    ################################################################### GETTERS
+
+    @property
+    def total(self):
+        total = 0
+        index = len(self._weights)
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    ################################################################### METHODS
+
+    def weight(self, position):
+        return self._weights[position]
+
+    def append(self, weight):
+        # The new node sums the weight and the nodes of the range it covers
+        self._weights.append(weight)
+        index = len(self._weights)
+        node = weight
+        child = index - 1
+        while child > index - (index & -index):
+            node += self._tree[child]
+            child -= child & -child
+        self._tree.append(node)
+
+    def update(self, position, weight):
+        delta = weight - self._weights[position]
+        self._weights[position] = weight
+        index = position + 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def find(self, value):
+        # The first position whose cumulated weight is over the value
+        position = 0
+        step = 1 << (len(self._weights).bit_length() - 1) if self._weights else 0
+        while step:
+            if (position + step < len(self._tree)) and (self._tree[position + step] <= value):
+                position += step
+                value -= self._tree[position]
+            step >>= 1
+        return min(position, len(self._weights) - 1)
+
+    def sample(self, random_value, excluded=None):
+        # The excluded position weighs nothing during the draw
+        if (excluded is None) or (len(self._weights) < 2):
+            return self.find(random_value * self.total)
+        weight = self._weights[excluded]
+        self.update(excluded, 0)
+        position = self.find(random_value * self.total)
+        self.update(excluded, weight)
+        return position
+
+    def sample_batch(self, count, generator, excluded=None):
+        # The descent of the tree is made for all the draws at once, then a draw equal to the one before it is drawn again without it
+        tree = numpy.frombuffer(self._tree, dtype=numpy.float64)
+        if generator not in self.numpy_generators:
+            self.numpy_generators[generator] = numpy.random.default_rng(generator.getrandbits(64))
+        values = self.numpy_generators[generator].random(count) * self.total
+        positions = numpy.zeros(count, dtype=numpy.int64)
+        step = 1 << (len(self._weights).bit_length() - 1) if self._weights else 0
+        while step:
+            candidates = positions + step
+            nodes = tree[numpy.minimum(candidates, len(tree) - 1)]
+            moves = (candidates < len(tree)) & (nodes <= values)
+            positions = numpy.where(moves, candidates, positions)
+            values = numpy.where(moves, values - nodes, values)
+            step >>= 1
+        positions = numpy.minimum(positions, len(self._weights) - 1).tolist()
+        previous = excluded
+        for index, position in enumerate(positions):
+            if position == previous:
+                positions[index] = position = self.sample(generator.random(), previous)
+            previous = position
+        return positions
+
+    def __len__(self):
+        return len(self._weights)
+
+
+class LessonSchedule:
+    __slots__ = ["_intervals", "_eases", "_dues", "_due_heap", "_new_heap", "_heap_size"]
+
+    def __init__(self):
+        # SM-2 state of each question of the lesson, at the position of the question: interval in days, ease, and due time in seconds
+        self._intervals = array("d")
+        self._eases = array("d")
+        self._dues = array("d")
+        # Heap of (due, position) of the reviewed questions, and heap of the positions of the questions never reviewed
+        # An entry whose due is not the due of its position anymore is skipped
+        self._due_heap = None
+        self._new_heap = None
+        self._heap_size = 0
+
+    ################################################################### METHODS
+
+    def interval(self, position):
+        return self._intervals[position] if position < len(self._intervals) else 0
+
+    def ease(self, position):
+        return self._eases[position] if position < len(self._eases) else DEFAULT_EASE
+
+    def due(self, position):
+        # 0 for the questions never reviewed
+        return self._dues[position] if position < len(self._dues) else 0
+
+    def set(self, position, interval, ease, due):
+        if position >= len(self._dues):
+            missing = position + 1 - len(self._dues)
+            self._intervals.extend(array("d", [0]) * missing)
+            self._eases.extend(array("d", [DEFAULT_EASE]) * missing)
+            self._dues.extend(array("d", [0]) * missing)
+        self._intervals[position] = interval
+        self._eases[position] = ease
+        self._dues[position] = due
+        if (self._due_heap is not None) and (position < self._heap_size):
+            if due > 0:
+                heappush(self._due_heap, (due, position))
+            else:
+                heappush(self._new_heap, position)
+            # The skipped entries are dropped when they outnumber the questions
+            if len(self._due_heap) + len(self._new_heap) > 2 * self._heap_size + 64:
+                self.clear_heaps()
+
+    def review(self, position, correct, now):
+        interval = self.interval(position)
+        quality = 4 if correct else 1
+        ease = max(MINIMAL_EASE, self.ease(position) + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        if not correct:
+            self.set(position, 0, ease, now + RELEARNING_DELAY)
+            return
+        if interval == 0:
+            interval = 1
+        elif interval == 1:
+            interval = 6
+        else:
+            interval = interval * ease
+        self.set(position, interval, ease, now + interval * 24 * 60 * 60)
+
+    def get_heaps(self, count):
+        if (self._due_heap is None) or (self._heap_size != count):
+            self._due_heap = [(self.due(position), position) for position in range(count) if self.due(position) > 0]
+            self._new_heap = [position for position in range(count) if self.due(position) == 0]
+            self._heap_size = count
+            heapify(self._due_heap)
+        return self._due_heap, self._new_heap
+
+    def clear_heaps(self):
+        self._due_heap = None
+        self._new_heap = None
+
+    def next_positions(self, count, number, excluded=(), now=0):
+        # The questions due first, the most overdue first, then the questions never reviewed in the order of the lesson, then the next ones to be due
+        due_heap, new_heap = self.get_heaps(count)
+        positions = []
+        popped_dues = []
+        popped_news = []
+        while due_heap and (len(positions) < number) and (due_heap[0][0] <= now):
+            due, position = heappop(due_heap)
+            if due != self.due(position):
+                continue
+            popped_dues.append((due, position))
+            if (position not in excluded) and (position not in positions):
+                positions.append(position)
+        while new_heap and (len(positions) < number):
+            position = heappop(new_heap)
+            if self.due(position) != 0:
+                continue
+            popped_news.append(position)
+            if (position not in excluded) and (position not in positions):
+                positions.append(position)
+        while due_heap and (len(positions) < number):
+            due, position = heappop(due_heap)
+            if due != self.due(position):
+                continue
+            popped_dues.append((due, position))
+            if (position not in excluded) and (position not in positions):
+                positions.append(position)
+        for entry in popped_dues:
+            heappush(due_heap, entry)
+        for position in popped_news:
+            heappush(new_heap, position)
+        return positions
+
+    def next_position(self, count, excluded=None, now=0):
+        positions = self.next_positions(count, 1, () if excluded is None else (excluded,), now)
+        return positions[0] if positions else excluded
+
+    def copy(self, position, schedule, schedule_position):
+        self.set(position, schedule.interval(schedule_position), schedule.ease(schedule_position), schedule.due(schedule_position))
+
+    def items(self):
+        for position, due in enumerate(self._dues):
+            if due > 0:
+                yield position, self._intervals[position], self._eases[position], due
+
+
+class LessonStats:
+    __slots__ = ["_correct", "_tries", "_device_correct", "_device_tries", "_tried_count", "_success_sum", "_sampler", "_schedule"]
+
+    def __init__(self):
+        # Counters of each question of the lesson, at the position of the question: for all the devices, and for this one
+        self._correct = array("L")
+        self._tries = array("L")
+        self._device_correct = array("L")
+        self._device_tries = array("L")
+        # Running totals, kept up to date by every change of the counters
+        self._tried_count = 0
+        self._success_sum = 0
+        self._sampler = None
+        self._schedule = None
+
+    ################################################################### GETTERS
+
+    @property
+    def tried_count(self):
+        return self._tried_count
+
+    @property
+    def success_sum(self):
+        return self._success_sum
+
+    @property
+    def sampler(self):
+        return self._sampler
+
+    @property
+    def schedule(self):
+        # Created by the first review, most lessons are never used in spaced repetition
+        if self._schedule is None:
+            self._schedule = LessonSchedule()
+        return self._schedule
+
+    @property
+    def has_schedule(self):
+        return self._schedule is not None
+
+    ################################################################### SETTERS
+
+    @sampler.setter
+    def sampler(self, sampler):
+        self._sampler = sampler
+
+    ################################################################### METHODS
+
+    def correct(self, position):
+        return self._correct[position] if position < len(self._correct) else 0
+
+    def tries(self, position):
+        return self._tries[position] if position < len(self._tries) else 0
+
+    def success(self, position):
+        tries = self.tries(position)
+        return self._correct[position] / tries if tries else 0
+
+    def device_correct(self, position):
+        return self._device_correct[position] if position < len(self._device_correct) else 0
+
+    def device_tries(self, position):
+        return self._device_tries[position] if position < len(self._device_tries) else 0
+
+    def set(self, position, correct, tries, device_correct=0, device_tries=0):
+        if position >= len(self._tries):
+            missing = array("L", [0]) * (position + 1 - len(self._tries))
+            for counters in [self._correct, self._tries, self._device_correct, self._device_tries]:
+                counters.extend(missing)
+        success = self.success(position)
+        self._tried_count += (tries > 0) - (self._tries[position] > 0)
+        self._correct[position] = correct
+        self._tries[position] = tries
+        self._device_correct[position] = device_correct
+        self._device_tries[position] = device_tries
+        self._success_sum += self.success(position) - success
+        if (self._sampler is not None) and (position < len(self._sampler)):
+            self._sampler.update(position, self.weight(position))
+
+    def weight(self, position):
+        # The chance of a question to be picked, the well known ones are picked less
+        return 1 - self.success(position) * 0.95
+
+    def answer(self, position, correct):
+        self.set(position, self.correct(position) + correct, self.tries(position) + 1, self.device_correct(position) + correct, self.device_tries(position) + 1)
+
+    def copy(self, position, stats, stats_position):
+        self.set(position, stats.correct(stats_position), stats.tries(stats_position), stats.device_correct(stats_position), stats.device_tries(stats_position))
+        if stats.has_schedule:
+            self.schedule.copy(position, stats.schedule, stats_position)
+
+    def device_items(self):
+        for position, tries in enumerate(self._device_tries):
+            if tries > 0:
+                yield position, self._device_correct[position], tries
+
+
 class Lesson:
-    def __init__(self, uid=None, name=None, icon=None, prerequisites=None, questions=None, is_locked=None):
+    __slots__ = ["_uid", "_name", "_icon", "_prerequisites", "_questions", "_is_locked", "_loader", "_question", "_stats", "_category", "_languages", "_count", "_ordered_questions"]
+
+    def __init__(self, uid=None, name=None, icon=None, prerequisites=None, questions=None, is_locked=None, loader=None):
         self._uid = uid
         self._name = name
         self._icon = icon
         self._prerequisites = prerequisites
-        self._questions = questions if questions else {}
+        self._questions = {} if loader is None else None
         self._is_locked = is_locked
+        self._loader = loader
         self._question = None
-        self._progress = None
-        self._success = None
-        self._stars = None
+        # The stats of each pair of languages (spoken, learned)
+        self._stats = {}
+        self._category = None
         self._languages = None
+        self._count = None
+        self._ordered_questions = []
+        for question in questions.values() if questions else []:
+            self.add_question(question)
 
     ################################################################### GETTERS
 
@@ -302,8 +1014,20 @@ class Lesson:
 
     @property
     def questions(self):
+        if self._questions is None:
+            self._questions = {}
+            self._ordered_questions = []
+            self.loader(self)
         return self._questions
 
+    @property
+    def is_loaded(self):
+        return self._questions is not None
+
+    @property
+    def loader(self):
+        return self._loader
+
     @property
     def question(self):
         return self._question
@@ -312,25 +1036,81 @@ class Lesson:
     def is_locked(self):
         return self._is_locked
 
+    @property
+    def category(self):
+        return self._category
+
+    @property
+    def stats(self):
+        # Switching the pair of languages only changes which stats are read
+        return self.get_pair_stats((SPOKEN_LANGUAGE, LEARNED_LANGUAGE))
+
+    @property
+    def pairs_stats(self):
+        return self._stats
+
+    @property
+    def requirements(self):
+        return [(category_uid, lesson_uid) for category_uid, lessons in self.prerequisites.items() for lesson_uid in lessons.keys()]
+
+    @property
+    def count(self):
+        # Known from the headers of the lesson, or once its questions have been loaded, and kept when they are unloaded
+        if self._count is None:
+            self._count = len(self.questions)
+        return self._count
+
     @property
     def progress(self):
-        return sum([1 for question in self.questions.values() if question.tries > 0]) / len(self.questions.keys())
+        count = self.count
+        return self.stats.tried_count / count
 
     @property
     def success(self):
-        return sum([question.success for question in self.questions.values()]) / len(self.questions.keys())
+        count = self.count
+        return self.stats.success_sum / count
 
     @property
     def languages(self):
-        languages = set()
-        for question in self.questions.values():
-            for language in question.languages.keys():
-                languages.add(language)
-        return list(languages)
+        if self._languages is None:
+            if isinstance(self.questions, QuestionTable):
+                self._languages = set(self.questions.languages)
+            else:
+                self._languages = set()
+                for question in self.questions.values():
+                    for language in question.languages.keys():
+                        self._languages.add(language)
+        return list(self._languages)
 
     @property
     def stars(self):
-        return len([i for i, value in enumerate(VALUE_STARS) if value <= self.success])
+        success = self.success
+        return len([i for i, value in enumerate(VALUE_STARS) if value <= success])
+
+    def get_pair_stats(self, pair):
+        if pair not in self._stats.keys():
+            self._stats[pair] = LessonStats()
+        return self._stats[pair]
+
+    def get_sampler(self):
+        stats = self.stats
+        if (stats.sampler is None) or (len(stats.sampler) != self.count):
+            stats.sampler = WeightedSampler([stats.weight(position) for position in range(self.count)])
+        return stats.sampler
+
+    def get_question(self, position):
+        if isinstance(self.questions, QuestionTable):
+            return self.questions.view(position)
+        return self._ordered_questions[position]
+
+    def get_strings(self):
+        for position in range(self.count):
+            question = self.get_question(position)
+            yield question.uid
+            for language in question.languages.values():
+                yield language.sentence
+                if language.hints is not None:
+                    yield language.hints
 
     ################################################################### SETTERS
 
@@ -354,39 +1134,127 @@ class Lesson:
     def questions(self, questions):
         self._questions = questions
 
+    @loader.setter
+    def loader(self, loader):
+        self._loader = loader
+        if self._questions == {}:
+            self._questions = None
+
     @question.setter
     def question(self, question):
         self._question = question
 
     @is_locked.setter
     def is_locked(self, is_locked):
-        self._is_locked = is_locked
+        if is_locked != self._is_locked:
+            self._is_locked = is_locked
+            self.changed()
+
+    @category.setter
+    def category(self, category):
+        self._category = category
+
+    @languages.setter
+    def languages(self, languages):
+        self._languages = None if languages is None else set(languages)
 
-    @stars.setter
-    def stars(self, stars):
-        self._stars = stars
+    @count.setter
+    def count(self, count):
+        self._count = count
 
     ################################################################### METHODS
 
     def add_question(self, question):
-        self._questions[question.uid] = question
+        questions = self.questions
+        if (type(questions) is dict) and (len(questions) >= COLUMNAR_THRESHOLD):
+            questions = self._questions = QuestionTable(questions.values(), self)
+            self._ordered_questions = []
+        question.lesson = self
+        question.position = questions[question.uid].position if question.uid in questions else len(questions)
+        questions[question.uid] = question
+        if type(questions) is dict:
+            # The questions by position, for the sampler
+            if question.position < len(self._ordered_questions):
+                self._ordered_questions[question.position] = question
+            else:
+                self._ordered_questions.append(question)
+        self._count = None
+        if self._languages is not None:
+            self._languages.update(question.languages.keys())
+        self.changed()
+
+    def propose(self, question, response, now=None):
+        correct = question.propose(response)
+        # The schedule follows every answer, so the profile can switch of mode at any time
+        self.stats.schedule.review(question.position, correct, current_time() if now is None else now)
+        self.changed()
+        return correct
 
-    def next_question(self):
-        deep_copy = deepcopy(self.questions)
-        questions_id = list(deep_copy.keys())
-        shuffle(questions_id)
-        for question_id in questions_id:
-            if (self.question) and (self.question.uid == question_id):
-                continue
-            if random() < self.questions[question_id].success * 0.95:
-                continue
-            self.question = self.questions[question_id]
-            return self.question
-        self.question = choice(list(self.questions.values()))
+    def changed(self):
+        # The category keeps the aggregates of its lessons until one of them changes
+        if self._category is not None:
+            self._category.invalidate()
+
+    def copy_stats(self, lesson):
+        for pair, stats in lesson.pairs_stats.items():
+            new_stats = self.get_pair_stats(pair)
+            for uid, question in self.questions.items():
+                if uid in lesson.questions.keys():
+                    new_stats.copy(question.position, stats, lesson.questions[uid].position)
+        self.changed()
+
+    def clear_stats(self):
+        # The stats of another profile are read again, the questions and their count stay the same
+        self._stats = {}
+        self.changed()
+
+    def unload(self):
+        # The stats stay, they are kept by position and the questions come back in the same order
+        if self.loader and self.is_loaded:
+            self._count = len(self._questions)
+            self._questions = None
+            self._ordered_questions = []
+            self._question = None
+            for stats in self._stats.values():
+                stats.sampler = None
+                if stats.has_schedule:
+                    stats.schedule.clear_heaps()
+            self.changed()
+
+    def next_question(self, generator=None, now=None):
+        # A question is never asked twice in a row
+        current_position = self.question.position if self.question else None
+        if SELECTION_MODE == MODE_SPACED_REPETITION:
+            position = self.stats.schedule.next_position(self.count, current_position, current_time() if now is None else now)
+        else:
+            # A question is drawn with the chance given by its weight
+            position = self.get_sampler().sample((generator or DEFAULT_RANDOM).random(), current_position)
+        self.question = self.get_question(position)
         return self.question
 
+    def plan_questions(self, number, planned=(), generator=None, now=None):
+        # The questions asked after the planned ones, drawn in one pass
+        previous = planned[-1] if planned else self.question
+        previous_position = previous.position if previous else None
+        if SELECTION_MODE == MODE_SPACED_REPETITION:
+            # The question being asked is due again once it is answered
+            excluded = {question.position for question in [*planned, self.question] if question is not None}
+            positions = self.stats.schedule.next_positions(self.count, number, excluded, current_time() if now is None else now)
+        else:
+            sampler = self.get_sampler()
+            generator = generator or DEFAULT_RANDOM
+            if (numpy is not None) and (number >= BATCH_SAMPLING_THRESHOLD):
+                positions = sampler.sample_batch(number, generator, previous_position)
+            else:
+                positions = []
+                for _ in range(number):
+                    previous_position = sampler.sample(generator.random(), previous_position)
+                    positions.append(previous_position)
+        return [self.get_question(position) for position in positions]
+
 
 class Category:
+    __slots__ = ["_uid", "_name", "_icon", "_lessons", "_lesson", "_is_locked", "_progress", "_success", "_languages"]
 
     def __init__(self, uid=None, name=None, icon=None, lessons=None, lesson=None):
         self._uid = uid
@@ -397,7 +1265,6 @@ class Category:
         self._is_locked = None
         self._progress = None
         self._success = None
-        self._stars = None
         self._languages = None
 
     ################################################################### GETTERS
@@ -424,101 +1291,624 @@ class Category:
 
     @property
     def is_locked(self):
-        for lesson in self.lessons.values():
-            if not lesson.is_locked:
-                return False
+        if self._is_locked is None:
+            self._is_locked = True
+            for lesson in self.lessons.values():
+                if not lesson.is_locked:
+                    self._is_locked = False
+                    break
+        return self._is_locked
+
+    @property
+    def progress(self):
+        if self._progress is None:
+            self._progress = sum([lesson.progress for lesson in self.lessons.values()]) / len(self.lessons.keys())
+        return self._progress
+
+    @property
+    def success(self):
+        if self._success is None:
+            self._success = sum([lesson.success for lesson in self.lessons.values()]) / len(self.lessons.keys())
+        return self._success
+
+    @property
+    def stars(self):
+        success = self.success
+        return len([i for i, value in enumerate(VALUE_STARS) if value <= success])
+
+    @property
+    def languages(self):
+        # The languages change only when a lesson is added or removed
+        if self._languages is None:
+            self._languages = set()
+            for lesson in self.lessons.values():
+                for language in lesson.languages:
+                    self._languages.add(language)
+        return list(self._languages)
+
+
+    ################################################################### SETTERS
+
+    @uid.setter
+    def uid(self, uid):
+        self._uid = uid
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @icon.setter
+    def icon(self, icon):
+        self._icon = icon
+
+    @lessons.setter
+    def lessons(self, lessons):
+        self._lessons = lessons
+
+    @lesson.setter
+    def lesson(self, lesson):
+        self._lesson = lesson
+
+    @is_locked.setter
+    def is_locked(self, is_locked):
+        self._is_locked = is_locked
+
+    ################################################################### METHODS
+
+    def add_lesson(self, lesson):
+        self.lessons[lesson.uid] = lesson
+        lesson.category = self
+        self._languages = None
+        self.invalidate()
+
+    def remove_lesson(self, lesson):
+        if self.lessons.get(lesson.uid) is lesson:
+            del self.lessons[lesson.uid]
+            lesson.category = None
+            self._languages = None
+            self.invalidate()
+
+    def invalidate(self):
+        self._is_locked = None
+        self._progress = None
+        self._success = None
+
+    def next_question(self, generator=None):
+        return self.lesson.next_question(generator)
+
+
+class ReviewQueue:
+    __slots__ = ["_lessons", "_offsets", "_indexes", "_active", "_size", "_sampler", "_question", "_generator"]
+
+    def __init__(self, lessons=None, question=None, generator=None):
+        # The questions of all the lessons are placed one after the other, a lesson starts at its offset
+        self._lessons = list(lessons) if lessons else []
+        self._offsets = []
+        self._indexes = {}
+        weights = []
+        for index, lesson in enumerate(self._lessons):
+            self._offsets.append(len(weights))
+            self._indexes[lesson] = index
+            stats = lesson.stats
+            weights.extend(stats.weight(position) for position in range(lesson.count))
+        # A lesson that leaves the review keeps its slots with no weight, so it can come back without a rebuild
+        self._active = set(range(len(self._lessons)))
+        self._size = len(weights)
+        # One sampler over the weakness of every question, updated at each answer
+        self._sampler = WeightedSampler(weights)
+        self._question = question
+        self._generator = generator or DEFAULT_RANDOM
+
+    ################################################################### GETTERS
+
+    @property
+    def lessons(self):
+        return self._lessons
+
+    @property
+    def question(self):
+        return self._question
+
+    ################################################################### METHODS
+
+    def slot(self, question):
+        index = self._indexes.get(question.lesson)
+        return None if (index is None) or (index not in self._active) else self._offsets[index] + question.position
+
+    def update(self, question):
+        slot = self.slot(question)
+        if slot is not None:
+            self._sampler.update(slot, question.lesson.stats.weight(question.position))
+
+    def add(self, lesson):
+        index = self._indexes.get(lesson)
+        if index in self._active:
+            return
+        stats = lesson.stats
+        if index is None:
+            index = len(self._lessons)
+            self._lessons.append(lesson)
+            self._offsets.append(len(self._sampler))
+            self._indexes[lesson] = index
+            for position in range(lesson.count):
+                self._sampler.append(stats.weight(position))
+        else:
+            for position in range(lesson.count):
+                self._sampler.update(self._offsets[index] + position, stats.weight(position))
+        self._active.add(index)
+        self._size += lesson.count
+
+    def remove(self, lesson):
+        index = self._indexes.get(lesson)
+        if index not in self._active:
+            return
+        for position in range(lesson.count):
+            self._sampler.update(self._offsets[index] + position, 0)
+        self._active.discard(index)
+        self._size -= lesson.count
+
+    def refresh(self, lessons):
+        # Only the given lessons can have changed of lock
+        for lesson in lessons:
+            if lesson.is_locked:
+                self.remove(lesson)
+            else:
+                self.add(lesson)
+
+    def next_question(self):
+        if not self._size:
+            return None
+        current_slot = self.slot(self._question) if self._question else None
+        slot = self._sampler.sample(self._generator.random(), current_slot)
+        index = bisect_right(self._offsets, slot) - 1
+        lesson = self._lessons[index]
+        lesson.question = lesson.get_question(slot - self._offsets[index])
+        self._question = lesson.question
+        return self._question
+
+    def __len__(self):
+        return self._size
+
+
+class Profile:
+    __slots__ = ["_uid", "_name", "_icon", "_mode", "_seed"]
+
+    def __init__(self, uid=None, name=None, icon=None, mode=MODE_SAMPLER, seed=None):
+        self._uid = uid
+        self._name = name
+        self._icon = icon
+        self._mode = mode
+        self._seed = seed
+
+    ################################################################### GETTERS
+
+    @property
+    def uid(self):
+        return self._uid
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def icon(self):
+        return self._icon
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def seed(self):
+        return self._seed
+
+    ################################################################### SETTERS
+
+    @uid.setter
+    def uid(self, uid):
+        self._uid = uid
+
+    @name.setter
+    def name(self, new_name):
+        self._name = new_name
+
+    @icon.setter
+    def icon(self, new_icon):
+        self._icon = new_icon
+
+    @mode.setter
+    def mode(self, new_mode):
+        self._mode = new_mode
+
+    @seed.setter
+    def seed(self, new_seed):
+        self._seed = new_seed
+
+class StringPool:
+
+    ################################################################### METHODS
+
+    def share(self, string):
+        # The interned strings are released when they are not used anymore, like after unloading a lesson
+        return intern(string)
+
+    def saved_bytes(self, groups):
+        # Measured on the strings in use, each use of a shared string after the first one would have been a copy of it
+        seen = set()
+        saved_bytes = {}
+        for group, strings in groups:
+            saved_bytes[group] = saved_bytes.get(group, 0)
+            for string in strings:
+                if id(string) in seen:
+                    saved_bytes[group] += getsizeof(string)
+                else:
+                    seen.add(id(string))
+        return saved_bytes
+
+class JsonReader:
+
+    def __init__(self, file=None, chunk_size=None):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._position = 0
+        self._decoder = JSONDecoder()
+
+    ################################################################### METHODS
+
+    def read_chunk(self):
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
         return True
 
+    def peek(self):
+        while True:
+            while (self._position < len(self._buffer)) and (self._buffer[self._position] in " \t\r\n"):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self.read_chunk():
+                raise JSONDecodeError("Unexpected end of file", self._buffer, self._position)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise JSONDecodeError(f"Expecting '{char}'", self._buffer, self._position)
+        self._position += 1
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                # A value that ends with the buffer can be truncated, like a number
+                if end < len(self._buffer):
+                    self._position = end
+                    return value
+            except JSONDecodeError:
+                pass
+            if not self.read_chunk():
+                value, self._position = self._decoder.raw_decode(self._buffer, self._position)
+                return value
+
+    def keys(self):
+        # Yields the keys of an object, the caller reads each value before asking for the next key
+        self.expect("{")
+        if self.peek() == "}":
+            self._position += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            delimiter = self.peek()
+            self._position += 1
+            if delimiter == "}":
+                return
+            if delimiter != ",":
+                raise JSONDecodeError("Expecting ',' delimiter", self._buffer, self._position - 1)
+
+class Catalog:
+
+    def __init__(self, file_path=None):
+        self._file_path = file_path
+        self._connection = None
+
+    ################################################################### GETTERS
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            makedirs(dirname(self.file_path), exist_ok=True)
+            self._connection = connect(self.file_path)
+            self.create_tables()
+        return self._connection
+
+    ################################################################### METHODS
+
+    def create_tables(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_VERSION:
+            self.connection.executescript("""
+                DROP TABLE IF EXISTS sources;
+                DROP TABLE IF EXISTS lessons;
+                DROP TABLE IF EXISTS questions;
+            """)
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, mtime INTEGER, hash TEXT);
+            CREATE TABLE IF NOT EXISTS lessons (id INTEGER PRIMARY KEY, source TEXT UNIQUE, category TEXT, uid TEXT, name TEXT, icon TEXT, prerequisites TEXT, languages TEXT, count INTEGER);
+            CREATE TABLE IF NOT EXISTS questions (lesson INTEGER, position INTEGER, uid TEXT, language TEXT, sentence TEXT, hints TEXT);
+            CREATE INDEX IF NOT EXISTS questions_lesson ON questions (lesson, position);
+            PRAGMA user_version = {CATALOG_VERSION};
+        """)
+
+    def update(self, file_paths, critical=True):
+        known_sources = {source: (mtime, file_hash) for source, mtime, file_hash in self.connection.execute("SELECT path, mtime, hash FROM sources")}
+        changed_files = []
+        for file_path in file_paths:
+            mtime = get_mtime(file_path)
+            if (file_path in known_sources) and (known_sources[file_path][0] == mtime):
+                continue
+            file_hash = hash_source(file_path)
+            if (file_path not in known_sources) or (known_sources[file_path][1] != file_hash):
+                changed_files.append((file_path, mtime, file_hash))
+            else:
+                self.connection.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (file_path, mtime, file_hash))
+        records = read_lessons([file_path for file_path, _, _ in changed_files], critical=critical)
+        for (file_path, mtime, file_hash), record in zip(changed_files, records):
+            # A lesson that cannot be read keeps its previous version, and is read again at the next update
+            if record is None:
+                continue
+            self.connection.execute("SAVEPOINT lesson")
+            try:
+                self.compile(record)
+            except JSONDecodeError:
+                print(f"Error decoding JSON in {file_path}")
+                if critical:
+                    exit()
+                self.connection.execute("ROLLBACK TO lesson")
+                continue
+            finally:
+                self.connection.execute("RELEASE lesson")
+            self.connection.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (file_path, mtime, file_hash))
+        for source in set(known_sources.keys()) - set(file_paths):
+            self.remove(source)
+        self.connection.commit()
+
+    def compile(self, record):
+        self.remove(record["source"], keep_source=True)
+        lesson_id = self.connection.execute("INSERT INTO lessons (source, category, uid, name, icon, prerequisites) VALUES (?, ?, ?, ?, ?, ?)",
+            (record["source"], record["category"], record["uid"], dumps(record["name"]), record["icon"], dumps(record["prerequisites"]))).lastrowid
+        # The rows are generated while they are inserted, so a streamed lesson is never entirely in memory
+        names = set()
+        count = 0
+        def rows():
+            nonlocal count
+            for position, (uid, languages) in enumerate(record["questions"]):
+                count = position + 1
+                for name, data in languages.items():
+                    names.add(name)
+                    yield lesson_id, position, uid, name, data["sentence"], data.get("hints")
+        self.connection.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?)", rows())
+        self.connection.execute("UPDATE lessons SET languages = ?, count = ? WHERE id = ?", (dumps(sorted(names)), count, lesson_id))
+
+    def remove(self, source, keep_source=False):
+        for (lesson_id,) in self.connection.execute("SELECT id FROM lessons WHERE source = ?", (source,)).fetchall():
+            self.connection.execute("DELETE FROM questions WHERE lesson = ?", (lesson_id,))
+        self.connection.execute("DELETE FROM lessons WHERE source = ?", (source,))
+        if not keep_source:
+            self.connection.execute("DELETE FROM sources WHERE path = ?", (source,))
+
+    def lessons(self):
+        cursor = self.connection.execute("SELECT source, category, uid, name, icon, prerequisites, languages, count FROM lessons ORDER BY source")
+        for row in cursor.fetchall():
+            yield self.create_record(*row)
+
+    def lesson(self, source):
+        row = self.connection.execute("SELECT source, category, uid, name, icon, prerequisites, languages, count FROM lessons WHERE source = ?", (source,)).fetchone()
+        return self.create_record(*row) if row else None
+
+    def create_record(self, source, category, uid, name, icon, prerequisites, languages, count):
+        return {
+            "source": source,
+            "category": category,
+            "uid": uid,
+            "name": loads(name),
+            "icon": icon,
+            "prerequisites": loads(prerequisites),
+            "languages": loads(languages),
+            "count": count,
+            "questions": self.questions(source)
+        }
+
+    def questions(self, source):
+        question_uid = None
+        languages = None
+        for uid, name, sentence, hints in self.connection.execute("SELECT uid, language, sentence, hints FROM questions WHERE lesson = (SELECT id FROM lessons WHERE source = ?) ORDER BY position", (source,)):
+            if uid != question_uid:
+                if languages:
+                    yield question_uid, languages
+                question_uid = uid
+                languages = {}
+            languages[name] = {"sentence": sentence} if hints is None else {"sentence": sentence, "hints": hints}
+        if languages:
+            yield question_uid, languages
+
+    def questions_uids(self, source):
+        return [uid for _, uid in self.connection.execute("SELECT DISTINCT position, uid FROM questions WHERE lesson = (SELECT id FROM lessons WHERE source = ?) ORDER BY position", (source,))]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class Snapshot:
+
+    def __init__(self, file_path=None):
+        self._file_path = file_path
+
+    ################################################################### GETTERS
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    ################################################################### METHODS
+
+    def key(self, stamps):
+        # The settings change what the records contain, so they are part of the key
+        content = dumps([SNAPSHOT_VERSION, CATALOG_VERSION, USE_CATALOG, LAZY_LOADING, STREAMING_THRESHOLD, COLUMNAR_THRESHOLD, sorted(stamps.items())])
+        return sha1(content.encode(FILES_ENCODING)).hexdigest()
+
+    def load(self, key):
+        # The key is read first, so an outdated snapshot is not read entirely
+        try:
+            with open(self.file_path, 'rb') as file:
+                if load_pickle(file) != key:
+                    return None
+                return load_pickle(file)
+        except (OSError, EOFError, UnpicklingError, ValueError):
+            return None
+
+    def save(self, key, records):
+        makedirs(dirname(self.file_path), exist_ok=True)
+        # The snapshot is written beside, then moved, so an interrupted launch never leaves half a snapshot
+        temp_path = self.file_path + ".tmp"
+        with open(temp_path, 'wb') as file:
+            dump_pickle(key, file)
+            dump_pickle(records, file)
+        replace(temp_path, self.file_path)
+
+    def create_record(self, record):
+        # The lazy lessons read their questions from the catalog or the lesson file, the others keep them
+        if LAZY_LOADING:
+            return {**record, "questions": []}
+        # Except the streamed lessons, which are streamed again from their file instead of being kept whole
+        if record["count"] is None:
+            return {**record, "questions": None}
+        return {**record, "questions": list(record["questions"])}
+
+class StatsMatrix:
+
+    def __init__(self, lessons=None, profiles=None):
+        # One column per question: the questions of a lesson are contiguous, and so are the lessons of a category
+        self._profiles = list(profiles.keys())
+        self._categories = []
+        self._lessons = []
+        columns = {}
+        lesson_offsets = []
+        category_offsets = []
+        for category_uid, category_lessons in lessons.items():
+            # The lessons without questions have no progress, like in the application
+            category_lessons = {lesson_uid: question_uids for lesson_uid, question_uids in category_lessons.items() if question_uids}
+            if not category_lessons:
+                continue
+            self._categories.append(category_uid)
+            category_offsets.append(len(self._lessons))
+            for lesson_uid, question_uids in category_lessons.items():
+                self._lessons.append((category_uid, lesson_uid))
+                lesson_offsets.append(len(columns))
+                for question_uid in question_uids:
+                    columns[(category_uid, lesson_uid, question_uid)] = len(columns)
+        self._lesson_offsets = numpy.array(lesson_offsets, dtype=numpy.intp)
+        self._lesson_sizes = numpy.diff(numpy.append(self._lesson_offsets, len(columns)))
+        self._category_offsets = numpy.array(category_offsets, dtype=numpy.intp)
+        self._category_sizes = numpy.diff(numpy.append(self._category_offsets, len(self._lessons)))
+        self._correct = numpy.zeros((len(self._profiles), len(columns)), dtype=numpy.int64)
+        self._tries = numpy.zeros((len(self._profiles), len(columns)), dtype=numpy.int64)
+        for row, stats in enumerate(profiles.values()):
+            for category_uid, lessons_stats in stats.items():
+                for lesson_uid, questions_stats in lessons_stats.items():
+                    for question_uid, devices in questions_stats.items():
+                        column = columns.get((category_uid, lesson_uid, question_uid))
+                        if column is None:
+                            continue
+                        for correct, tries in devices.values():
+                            self._correct[row, column] += correct
+                            self._tries[row, column] += tries
+
+    ################################################################### GETTERS
+
+    @property
+    def profiles(self):
+        return self._profiles
+
     @property
-    def progress(self):
-        return sum([lesson.progress for lesson in self.lessons.values()]) / len(self.lessons.keys())
+    def categories(self):
+        return self._categories
 
     @property
-    def success(self):
-        return sum([lesson.success for lesson in self.lessons.values()]) / len(self.lessons.keys())
+    def lessons(self):
+        return self._lessons
 
     @property
-    def stars(self):
-        return len([i for i, value in enumerate(VALUE_STARS) if value <= self.success])
+    def correct(self):
+        return self._correct
 
     @property
-    def languages(self):
-        languages = set()
-        for lesson in self.lessons.values():
-            for language in lesson.languages:
-                languages.add(language)
-        return list(languages)
-
-
-    ################################################################### SETTERS
-
-    @uid.setter
-    def uid(self, uid):
-        self._uid = uid
-
-    @name.setter
-    def name(self, name):
-        self._name = name
-
-    @icon.setter
-    def icon(self, icon):
-        self._icon = icon
-
-    @lessons.setter
-    def lessons(self, lessons):
-        self._lessons = lessons
-
-    @lesson.setter
-    def lesson(self, lesson):
-        self._lesson = lesson
+    def tries(self):
+        return self._tries
 
-    @is_locked.setter
-    def is_locked(self, is_locked):
-        self._is_locked = is_locked
+    @property
+    def success(self):
+        return numpy.divide(self._correct, self._tries, out=numpy.zeros(self._tries.shape), where=(self._tries > 0))
 
     ################################################################### METHODS
 
-    def add_lesson(self, lesson):
-        self.lessons[lesson.uid] = lesson
-
-    def next_question(self):
-        return self.lesson.next_question()
+    def reduce(self):
+        # Every value of every profile is computed at once, with one row per profile
+        if not self._lessons:
+            empty = numpy.zeros((len(self._profiles), 0))
+            return {"lessons": {"progress": empty, "success": empty, "stars": empty}, "categories": {"progress": empty, "success": empty, "stars": empty}}
+        lessons_progress = numpy.add.reduceat(self._tries > 0, self._lesson_offsets, axis=1, dtype=numpy.int64) / self._lesson_sizes
+        lessons_success = numpy.add.reduceat(self.success, self._lesson_offsets, axis=1) / self._lesson_sizes
+        categories_progress = numpy.add.reduceat(lessons_progress, self._category_offsets, axis=1) / self._category_sizes
+        categories_success = numpy.add.reduceat(lessons_success, self._category_offsets, axis=1) / self._category_sizes
+        return {
+            "lessons": {"progress": lessons_progress, "success": lessons_success, "stars": self.count_stars(lessons_success)},
+            "categories": {"progress": categories_progress, "success": categories_success, "stars": self.count_stars(categories_success)}
+        }
 
+    def count_stars(self, success):
+        return (success[..., numpy.newaxis] >= numpy.array(VALUE_STARS)).sum(axis=-1)
 
-class Profile:
+class Residency:
 
-    def __init__(self, uid=None, name=None, icon=None):
-        self._uid = uid
-        self._name = name
-        self._icon = icon
+    def __init__(self, budget=None):
+        self._budget = budget
+        # The least recently used lessons first
+        self._lessons = OrderedDict()
 
     ################################################################### GETTERS
 
     @property
-    def uid(self):
-        return self._uid
-
-    @property
-    def name(self):
-        return self._name
+    def budget(self):
+        return self._budget
 
     @property
-    def icon(self):
-        return self._icon
+    def lessons(self):
+        return list(self._lessons.keys())
 
-    ################################################################### SETTERS
+    ################################################################### METHODS
 
-    @uid.setter
-    def uid(self, uid):
-        self._uid = uid
+    def touch(self, lesson):
+        self._lessons[lesson] = None
+        self._lessons.move_to_end(lesson)
+        while self._budget and (len(self._lessons) > self._budget):
+            evicted_lesson, _ = self._lessons.popitem(last=False)
+            evicted_lesson.unload()
 
-    @name.setter
-    def name(self, new_name):
-        self._name = new_name
+    def forget(self, lesson):
+        self._lessons.pop(lesson, None)
 
-    @icon.setter
-    def icon(self, new_icon):
-        self._icon = new_icon
+    def clear(self):
+        self._lessons.clear()
 
 class Timer:
 
@@ -574,14 +1964,20 @@ class Timer:
             second = int(time_left / 1000)
             if second != last_second:
                 last_second = second
-                self.parent.set_window_title(f'{second}s left...')
+                self.parent.after(0, partial(self.parent.set_window_title, f'{second}s left...'))
                 if second <= 3:
                     playsound(join(PATH_SOUNDS, SOUND_BIP), False)
             if time_left <= 0:
-                self.action()
+                # The window and the catalog are only used from the thread of the window
+                self.parent.after(0, partial(self.expire, current_thread()))
             else:
                 sleep(0.001)
 
+    def expire(self, thread):
+        # The timer can have been stopped, or started again, before the window runs the action
+        if self.running and (self.thread is thread):
+            self.action()
+
     def stop(self):
         if not self.running:
             return
@@ -594,17 +1990,34 @@ class Bilingual(Tk):
         self.protocol("WM_DELETE_WINDOW", self.close_app)
         self._icons = {}
         self._icon = None
+        self._pack_icons = {}
         self._profiles = {}
         self._profile = None
+        self._profile_stats = None
+        self._profile_schedule = None
         self._categories = {}
         self._category = None
-        self._lessons = None
+        self._lessons = {}
         self._lesson = None
-        self._languages = None
+        self._review = None
+        self._plan = deque()
+        self._random = DEFAULT_RANDOM
+        self._languages = []
+        self._dependents = {}
         self._questions = None
         self._question = None
         self._last_lesson_stars = None
         self._explainations = None
+        self._explainations_cache = {}
+        self._prefetched_speeches = set()
+        self._sources = {}
+        self._headers_uids = {}
+        self._strings = StringPool()
+        self._lessons_stamps = {}
+        self._explainations_stamps = {}
+        self._catalog = Catalog(join(PATH_CACHE, FILE_CATALOG))
+        self._snapshot = Snapshot(join(PATH_CACHE, FILE_SNAPSHOT))
+        self._residency = Residency(RESIDENT_LESSONS)
         self._timer = Timer(self)
         self.load_profiles()
         self.load_categories()
@@ -612,19 +2025,15 @@ class Bilingual(Tk):
         self.set_styles()
         self.create_window()
         self.display_profiles()
+        if HOT_RELOAD:
+            self.after(HOT_RELOAD_INTERVAL, self.watch_content)
 
     ################################################################### GETTERS
     
     # FILES
     @log_calls
     def get_files(self, parent, extension=None):
-        files_list = []
-        for subdir, _, files in walk(parent):
-            if extension:
-                files_list += [join(subdir, f) for f in files if f.endswith(extension)]
-            else:
-                files_list += [join(subdir, f) for f in files]
-        return files_list
+        return find_files(parent, extension)
 
     # ICONS
     @property
@@ -635,6 +2044,10 @@ class Bilingual(Tk):
     def icon(self):
         return self._icon
 
+    @property
+    def pack_icons(self):
+        return self._pack_icons
+
     # PROFILES
     @property
     def profile(self):
@@ -644,6 +2057,14 @@ class Bilingual(Tk):
     def profiles(self):
         return self._profiles
 
+    @property
+    def profile_stats(self):
+        return self._profile_stats
+
+    @property
+    def profile_schedule(self):
+        return self._profile_schedule
+
     @log_calls
     def get_profiles_count(self):
         return len(self.profiles.keys())
@@ -651,11 +2072,7 @@ class Bilingual(Tk):
     # LANGUAGES
     @property
     def languages(self):
-        languages = set()
-        for category in self.categories.values():
-            for language in category.languages:
-                languages.add(language)
-        return list(languages)
+        return self._languages
 
     # STARS
     @property
@@ -678,11 +2095,24 @@ class Bilingual(Tk):
 
     @property
     def lessons(self):
-        lessons = {}
-        for category in self.categories.values():
-            for lesson in category.lessons.values():
-                lessons[lesson.uid] = lesson
-        return lessons
+        # Lessons of different categories can have the same id, so they are indexed by (category id, lesson id)
+        return self._lessons
+
+    @property
+    def dependents(self):
+        return self._dependents
+
+    @property
+    def review(self):
+        return self._review
+
+    @property
+    def plan(self):
+        return self._plan
+
+    @property
+    def random(self):
+        return self._random
 
     # QUESTION
     @property
@@ -693,21 +2123,73 @@ class Bilingual(Tk):
     def explainations(self):
         return self._explainations
 
+    @property
+    def explainations_cache(self):
+        return self._explainations_cache
+
+    @property
+    def prefetched_speeches(self):
+        return self._prefetched_speeches
+
     @log_calls 
-    def get_question_explainations(self): 
+    def get_question_explainations(self, question=None): 
+        question = question or self.question
+        # The explainations of the planned questions are found before they are asked
+        key = (SPOKEN_LANGUAGE, LEARNED_LANGUAGE, question.answer)
+        if key in self.explainations_cache.keys():
+            return self.explainations_cache[key]
+
         explaination_text = [] 
         if LEARNED_LANGUAGE in self.explainations.keys(): 
             for item in self.explainations[LEARNED_LANGUAGE]: 
                 for patern in item["paterns"]: 
-                    if patern in self.question.answer: 
+                    if patern in question.answer: 
                         if SPOKEN_LANGUAGE in item["explainations"].keys(): 
                             explaination_text.append(item["explainations"][SPOKEN_LANGUAGE]) 
  
+        self.explainations_cache[key] = explaination_text
         return explaination_text 
 
     @property
     def timer(self):
         return self._timer
+
+    @property
+    def catalog(self):
+        return self._catalog
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def residency(self):
+        return self._residency
+
+    @property
+    def strings(self):
+        return self._strings
+
+    # HOT RELOAD
+    @property
+    def sources(self):
+        return self._sources
+
+    @property
+    def headers_uids(self):
+        return self._headers_uids
+
+    @property
+    def lessons_stamps(self):
+        return self._lessons_stamps
+
+    @property
+    def explainations_stamps(self):
+        return self._explainations_stamps
+
+    @log_calls
+    def stamp_files(self, file_paths):
+        return {file_path: stamp_source(file_path) for file_path in file_paths}
  
     ################################################################### SETTERS
 
@@ -728,11 +2210,23 @@ class Bilingual(Tk):
         self._icon = icon
         self.set_window_icon(icon)
 
+    @pack_icons.setter
+    def pack_icons(self, pack_icons):
+        self._pack_icons = pack_icons
+
     # PROFILE
     @profile.setter
     def profile(self, profile):
         self._profile = profile
 
+    @profile_stats.setter
+    def profile_stats(self, profile_stats):
+        self._profile_stats = profile_stats
+
+    @profile_schedule.setter
+    def profile_schedule(self, profile_schedule):
+        self._profile_schedule = profile_schedule
+
     # STARS
     @last_lesson_stars.setter
     def last_lesson_stars(self, last_lesson_stars):
@@ -752,11 +2246,32 @@ class Bilingual(Tk):
     def explainations(self, explainations):
         self._explainations = explainations
 
+    # LANGUAGES
+    @languages.setter
+    def languages(self, languages):
+        self._languages = languages
+
     # LESSON
     @lessons.setter
     def lessons(self, lessons):
         self._lessons = lessons
 
+    @dependents.setter
+    def dependents(self, dependents):
+        self._dependents = dependents
+
+    @review.setter
+    def review(self, review):
+        self._review = review
+
+    @plan.setter
+    def plan(self, plan):
+        self._plan = plan
+
+    @random.setter
+    def random(self, random):
+        self._random = random
+
     # LESSON
     @lesson.setter
     def lesson(self, lesson):
@@ -767,6 +2282,15 @@ class Bilingual(Tk):
     def timer(self, timer):
         self._timer = timer
 
+    # HOT RELOAD
+    @lessons_stamps.setter
+    def lessons_stamps(self, lessons_stamps):
+        self._lessons_stamps = lessons_stamps
+
+    @explainations_stamps.setter
+    def explainations_stamps(self, explainations_stamps):
+        self._explainations_stamps = explainations_stamps
+
     ################################################################### READERS
 
     # IMAGES
@@ -782,7 +2306,11 @@ class Bilingual(Tk):
         image_path = join(PATH_ICONS, image_name)
 
         try:
-            image = Image.open(image_path)
+            if (not isfile(image_path)) and (name in self.pack_icons.keys()):
+                image_path = self.pack_icons[name]
+                image = Image.open(BytesIO(read_source(image_path)))
+            else:
+                image = Image.open(image_path)
         except Exception as e:
             print(f'Error: Impossible to resize the image at "{image_path}" to {width}x{height}. ({e})')
             return None
@@ -825,6 +2353,8 @@ class Bilingual(Tk):
                 new_profile.uid = file_name
                 new_profile.name = file_name.title()
                 new_profile.icon = json_content["icon"]
+                new_profile.mode = json_content.get("mode", MODE_SAMPLER)
+                new_profile.seed = json_content.get("seed")
                 self.add_profile(new_profile)
 
     @log_calls
@@ -833,81 +2363,336 @@ class Bilingual(Tk):
         profile_content = self.read_from_file(profile_path)
         profile = loads(profile_content)
         self.icon = profile["icon"]
-        for category in self.categories.values():
-            for lesson in category.lessons.values():
-                for question in lesson.questions.values():
-                    for language in question.languages.keys():
-                        try:
-                            value = profile["categories"][category.uid][lesson.uid][question.uid][language]["success"]
-                            self.categories[category.uid].lessons[lesson.uid].questions[question.uid].languages[language].success = value
-                        except:
-                            pass
-                        try:
-                            value = profile["categories"][category.uid][lesson.uid][question.uid][language]["tries"]
-                            self.categories[category.uid].lessons[lesson.uid].questions[question.uid].languages[language].tries = value
-                        except:
-                            pass
+        self.profile_stats = read_profile_stats(profile, self.languages)
+        self.profile_schedule = profile.get("schedule", {})
+        for source, (category, lesson) in self.sources.items():
+            self.load_headers_stats(category, lesson, source)
         self.check_prerequisites()
 
+    @log_calls
+    def load_headers_stats(self, category, lesson, source):
+        # The ids of the questions of a lazy lesson are given by the catalog or its headers, so it is not loaded
+        if lesson.is_loaded:
+            self.load_lesson_stats(category, lesson)
+        elif USE_CATALOG:
+            self.load_lesson_stats(category, lesson, self.catalog.questions_uids(source))
+        else:
+            questions_uids = self.headers_uids.get(source)
+            if questions_uids is None:
+                # Only the ids of a streamed lesson are kept, which also gives its count
+                questions_uids = [uid for uid, _ in stream_questions(source)]
+                self.headers_uids[source] = questions_uids
+                lesson.count = len(questions_uids)
+            self.load_lesson_stats(category, lesson, questions_uids)
+
+    @log_calls
+    def load_lesson_stats(self, category, lesson, questions_uids=None):
+        if self.profile_stats is None:
+            return
+        # The ids of the questions of a lesson known by its headers only are enough to place its stats
+        if questions_uids is None:
+            questions_uids = lesson.questions.keys()
+        positions = {uid: position for position, uid in enumerate(questions_uids)}
+        for pair_key, categories_stats in self.profile_stats.items():
+            questions_stats = categories_stats.get(category.uid, {}).get(lesson.uid)
+            if not questions_stats:
+                continue
+            stats = lesson.get_pair_stats(split_pair(pair_key))
+            for question_uid, devices in questions_stats.items():
+                if question_uid not in positions.keys():
+                    continue
+                correct = sum(counters[0] for counters in devices.values())
+                tries = sum(counters[1] for counters in devices.values())
+                device_correct, device_tries = devices.get(DEVICE, (0, 0))
+                stats.set(positions[question_uid], correct, tries, device_correct, device_tries)
+        for pair_key, categories_schedule in self.profile_schedule.items():
+            questions_schedule = categories_schedule.get(category.uid, {}).get(lesson.uid)
+            if not questions_schedule:
+                continue
+            schedule = lesson.get_pair_stats(split_pair(pair_key)).schedule
+            for question_uid, (interval, ease, due) in questions_schedule.items():
+                if question_uid in positions.keys():
+                    schedule.set(positions[question_uid], interval, ease, due)
+        lesson.changed()
+
     # CATEGORIES
     @log_calls
     def load_categories(self):
-        json_files = self.get_files(PATH_CATEGORIES, "json")
+        json_files = find_lessons(PATH_CATEGORIES)
+        self.pack_icons = {basename(source).replace(".png", ""): source for source in find_pack_files(PATH_CATEGORIES, ".png")}
+        lessons_stamps = self.stamp_files(json_files) if (USE_SNAPSHOT or HOT_RELOAD) else {}
+
+        records = None
+        if USE_SNAPSHOT:
+            snapshot_key = self.snapshot.key(lessons_stamps)
+            # The lazy lessons of a snapshot read their questions from the catalog, so it must still be there
+            if (not USE_CATALOG) or (not LAZY_LOADING) or exists(self.catalog.file_path):
+                records = self.snapshot.load(snapshot_key)
+
+        if records is None:
+            if USE_CATALOG:
+                self.catalog.update(json_files)
+                records = self.catalog.lessons()
+            else:
+                records = read_lessons(json_files, headers_only=LAZY_LOADING)
+            if USE_SNAPSHOT:
+                records = [self.snapshot.create_record(record) for record in records]
+                self.snapshot.save(snapshot_key, records)
 
-        for file_path in json_files:
-            folder_name = basename(dirname(file_path))
+        for record in records:
+            self.load_lesson(record)
+        self.load_languages()
+        self.load_prerequisites()
 
-            if folder_name not in self.categories.keys():
-                new_category = Category()
-                new_category.uid = folder_name
-                new_category.icon = folder_name
-                new_category.name = folder_name.title()
-                self.add_category(new_category)
-            
-            category = self.categories[folder_name] 
+        if HOT_RELOAD:
+            self.lessons_stamps = lessons_stamps
+
+        if DEBUG_MODE:
+            self.report_memory()
 
-            json_content = loads(self.read_from_file(file_path))
+    @log_calls
+    def load_lesson(self, record):
+        folder_name = record["category"]
+
+        if folder_name not in self.categories.keys():
+            new_category = Category()
+            new_category.uid = folder_name
+            new_category.icon = folder_name
+            new_category.name = folder_name.title()
+            self.add_category(new_category)
+
+        category = self.categories[folder_name]
+
+        new_lesson = Lesson()
+        new_lesson.uid = record["uid"]
+        new_lesson.name = record["name"]
+        new_lesson.icon = record["icon"]
+        new_lesson.prerequisites = record["prerequisites"]
+        new_lesson.languages = record.get("languages")
+
+        if LAZY_LOADING:
+            new_lesson.loader = partial(self.load_questions, category, record["source"])
+            new_lesson.count = record.get("count")
+            # None for a streamed lesson, whose ids are streamed when they are needed
+            self.headers_uids[record["source"]] = record.get("uids")
+        else:
+            questions = stream_questions(record["source"]) if record["questions"] is None else record["questions"]
+            try:
+                for uid, languages in questions:
+                    new_lesson.add_question(self.create_question(uid, languages))
+            except JSONDecodeError:
+                print(f"Error decoding JSON in {record['source']}")
+        category.add_lesson(new_lesson)
+        self.lessons[(category.uid, new_lesson.uid)] = new_lesson
+        self.sources[record["source"]] = (category, new_lesson)
+        return category, new_lesson
 
-            new_lesson = Lesson()
-            new_lesson.uid = json_content["id"]
-            new_lesson.name = json_content["name"]
-            new_lesson.icon = json_content["icon"]
-            new_lesson.prerequisites = json_content["prerequisites"]
+    @log_calls
+    def load_languages(self):
+        languages = set()
+        for category in self.categories.values():
+            for language in category.languages:
+                languages.add(language)
+        self.languages = sorted(languages)
 
-            for uid, languages in json_content["questions"].items():
-                new_question = Question()
-                new_question.uid = uid
+    @log_calls
+    def load_prerequisites(self):
+        # Reverse edges: the lessons to check again when the stars of a lesson change
+        dependents = {}
+        for (category_uid, lesson_uid), lesson in self.lessons.items():
+            for requirement in lesson.requirements:
+                if requirement not in self.lessons.keys():
+                    print(f"Warning : The lesson {category_uid}/{lesson_uid} requires the lesson {'/'.join(requirement)}, which does not exist.")
+                if requirement not in dependents.keys():
+                    dependents[requirement] = []
+                dependents[requirement].append(lesson)
+        self.dependents = dependents
+
+        for cycle in self.find_prerequisites_cycles():
+            path = " -> ".join("/".join(key) for key in cycle + cycle[:1])
+            print(f"Warning : The lessons {path} require each other, they can never be unlocked.")
 
-                for name, data in languages.items():
-                    new_language = Language()
-                    new_language.name = name
-                    new_language.sentence = data["sentence"]
-                    if "hints" in data.keys():
-                        new_language.hints = data["hints"]
-                    new_question.add_language(new_language)
+    @log_calls
+    def find_prerequisites_cycles(self):
+        # Depth first search, a requirement still on the current path closes a cycle
+        cycles = []
+        states = {}
+        for start in self.lessons.keys():
+            if start in states.keys():
+                continue
+            path = [start]
+            requirements = [iter(self.lessons[start].requirements)]
+            states[start] = "visiting"
+            while requirements:
+                requirement = next(requirements[-1], None)
+                if requirement is None:
+                    states[path.pop()] = "visited"
+                    requirements.pop()
+                elif requirement not in self.lessons.keys():
+                    continue
+                elif states.get(requirement) == "visiting":
+                    cycles.append(path[path.index(requirement):])
+                elif requirement not in states.keys():
+                    path.append(requirement)
+                    requirements.append(iter(self.lessons[requirement].requirements))
+                    states[requirement] = "visiting"
+        return cycles
+
+    @log_calls
+    def load_questions(self, category, source, lesson):
+        if USE_CATALOG:
+            questions = self.catalog.questions(source)
+        else:
+            questions = read_lesson(source)["questions"]
+
+        try:
+            for uid, languages in questions:
+                lesson.add_question(self.create_question(uid, languages))
+        except JSONDecodeError:
+            print(f"Error decoding JSON in {source}")
+        self.load_lesson_stats(category, lesson)
+        self.residency.touch(lesson)
+
+    @log_calls
+    def create_question(self, uid, languages):
+        strings = self.strings
+        new_question = Question()
+        new_question.uid = strings.share(uid)
+
+        for name, data in languages.items():
+            new_language = Language()
+            new_language.name = strings.share(name)
+            new_language.sentence = strings.share(data["sentence"])
+            if "hints" in data.keys():
+                new_language.hints = strings.share(data["hints"])
+            new_question.add_language(new_language)
 
-                new_lesson.add_question(new_question)
-            category.add_lesson(new_lesson)
+        return new_question
 
     # QUESTIONS
     @log_calls
     def load_explainations(self):
         self.explainations = {}  # Dictionary to store the result
+        self.explainations_cache.clear()
+
+        json_files = find_files(PATH_EXPLAINATIONS, ".json")
+        for file_path in json_files:
+            self.load_explaination(file_path)
+
+        if HOT_RELOAD:
+            self.explainations_stamps = self.stamp_files(json_files)
+
+    @log_calls
+    def load_explaination(self, file_path, critical=True):
+        file_name = basename(file_path).replace(".json", "")
+
+        with open(file_path, 'r', encoding=FILES_ENCODING) as json_file:
+            try:
+                file_content = load(json_file)
+                self.explainations[file_name] = file_content
+            except JSONDecodeError:
+                print(f"Error decoding JSON in {file_path}")
+                if critical:
+                    exit()
 
-        for subdir, _, files in walk(PATH_EXPLAINATIONS):
-            json_files = [f for f in files if f.endswith('.json')]
+    # HOT RELOAD
+    @log_calls
+    def watch_content(self):
+        self.after(HOT_RELOAD_INTERVAL, self.watch_content)
+
+        lessons_stamps = self.stamp_files(find_lessons(PATH_CATEGORIES))
+        changed = [source for source, stamp in lessons_stamps.items() if self.lessons_stamps.get(source) != stamp]
+        removed = [source for source in self.lessons_stamps.keys() if source not in lessons_stamps.keys()]
+        self.lessons_stamps = lessons_stamps
+        if changed or removed:
+            self.reload_lessons(list(lessons_stamps.keys()), changed, removed)
+
+        explainations_stamps = self.stamp_files(find_files(PATH_EXPLAINATIONS, ".json"))
+        for file_path, stamp in explainations_stamps.items():
+            if self.explainations_stamps.get(file_path) != stamp:
+                self.load_explaination(file_path, critical=False)
+                self.explainations_cache.clear()
+        for file_path in self.explainations_stamps.keys():
+            if file_path not in explainations_stamps.keys():
+                self.explainations.pop(basename(file_path).replace(".json", ""), None)
+                self.explainations_cache.clear()
+        self.explainations_stamps = explainations_stamps
+
+    @log_calls
+    def reload_lessons(self, file_paths, changed, removed):
+        # The lessons files found by the poll, so the tree is walked once
+        if USE_CATALOG:
+            self.catalog.update(file_paths, critical=False)
+
+        modified = []
+        for source in removed:
+            if source in self.sources.keys():
+                category, lesson = self.sources.pop(source)
+                self.headers_uids.pop(source, None)
+                self.remove_lesson(category, lesson)
+                modified.append((category.uid, lesson.uid))
+                if self.review is not None:
+                    self.review.remove(lesson)
+
+        reloaded = []
+        for source in changed:
+            if USE_CATALOG:
+                record = self.catalog.lesson(source)
+            else:
+                record = read_lesson(source, headers_only=LAZY_LOADING, critical=False)
+            if record is None:
+                continue
+            if (self.review is not None) and (source in self.sources.keys()):
+                self.review.remove(self.sources[source][1])
+            category, lesson = self.reload_lesson(record)
+            modified.append((category.uid, lesson.uid))
+            reloaded.append(lesson)
+        self.load_languages()
+        self.load_prerequisites()
+
+        # Only the reloaded lessons and the lessons that require them can change of lock
+        if self.profile_stats is not None:
+            dependents = [lesson for key in modified for lesson in self.dependents.get(key, [])]
+            self.check_prerequisites(reloaded + dependents)
+            if self.review is not None:
+                self.review.refresh(reloaded + dependents)
 
-            for json_file in json_files:
-                file_name = json_file.replace(".json", "")
-                file_path = join(subdir, json_file)
+    @log_calls
+    def reload_lesson(self, record):
+        old_category, old_lesson = self.sources.get(record["source"], (None, None))
+        # A lesson that keeps its id is replaced at the same place in its category
+        if (old_lesson is not None) and (old_lesson.uid != record["uid"]):
+            self.remove_lesson(old_category, old_lesson, keep_category=True)
+
+        category, new_lesson = self.load_lesson(record)
+        if (self.profile_stats is not None) and (not new_lesson.is_loaded):
+            self.load_headers_stats(category, new_lesson, record["source"])
+        if old_lesson is None:
+            return category, new_lesson
+        self.residency.forget(old_lesson)
+
+        # The stats of the lazy lessons are read again from the profile when the questions are loaded
+        if old_lesson.is_loaded and new_lesson.is_loaded:
+            new_lesson.copy_stats(old_lesson)
+
+        if self.lesson is old_lesson:
+            self.category = category
+            self.lesson = new_lesson
+            self.plan.clear()
+            if (self.question is not None) and (self.question.uid in new_lesson.questions.keys()):
+                self.question = new_lesson.questions[self.question.uid]
+                new_lesson.question = self.question
+
+        return category, new_lesson
 
-                with open(file_path, 'r', encoding=FILES_ENCODING) as json_file:
-                    try:
-                        file_content = load(json_file)
-                        self.explainations[file_name] = file_content
-                    except JSONDecodeError:
-                        print(f"Error decoding JSON in {file_path}")
-                        exit()                
+    @log_calls
+    def remove_lesson(self, category, lesson, keep_category=False):
+        category.remove_lesson(lesson)
+        self.residency.forget(lesson)
+        if self.lessons.get((category.uid, lesson.uid)) is lesson:
+            del self.lessons[(category.uid, lesson.uid)]
+        if (not keep_category) and (not category.lessons) and (self.categories.get(category.uid) is category):
+            del self.categories[category.uid]
 
     ################################################################### WRITERS
     
@@ -940,30 +2725,36 @@ class Bilingual(Tk):
         profile = loads(profile_content)
         for category in self.categories.values():
             for lesson in category.lessons.values():
-                for question in lesson.questions.values():
-                    if category.uid not in profile["categories"].keys():
-                        profile["categories"][category.uid] = {}
-                    if lesson.uid not in profile["categories"][category.uid].keys():
-                        profile["categories"][category.uid][lesson.uid] = {}
-                    if question.uid not in profile["categories"][category.uid][lesson.uid].keys():
-                        profile["categories"][category.uid][lesson.uid][question.uid] = {}
-                    if LEARNED_LANGUAGE not in profile["categories"][category.uid][lesson.uid][question.uid].keys():
-                        profile["categories"][category.uid][lesson.uid][question.uid][LEARNED_LANGUAGE] = {}
-                    profile["categories"][category.uid][lesson.uid][question.uid][LEARNED_LANGUAGE]["success"] = question.success
-                    profile["categories"][category.uid][lesson.uid][question.uid][LEARNED_LANGUAGE]["tries"] = question.tries
+                if not lesson.is_loaded:
+                    continue
+                questions_uids = list(lesson.questions.keys())
+                for pair, stats in lesson.pairs_stats.items():
+                    # Only the counters of this device are written, the ones of the other devices are kept as they were read
+                    for position, correct, tries in stats.device_items():
+                        questions_stats = self.profile_stats.setdefault(join_pair(*pair), {}).setdefault(category.uid, {}).setdefault(lesson.uid, {})
+                        questions_stats.setdefault(questions_uids[position], {})[DEVICE] = [correct, tries]
+                    if stats.has_schedule:
+                        questions_schedule = self.profile_schedule.setdefault(join_pair(*pair), {}).setdefault(category.uid, {}).setdefault(lesson.uid, {})
+                        for position, interval, ease, due in stats.schedule.items():
+                            questions_schedule[questions_uids[position]] = [interval, ease, due]
+        # The stats by learned language only are replaced by the stats by pair, read from them when the profile was loaded
+        profile.pop("categories", None)
+        profile["stats"] = self.profile_stats
+        profile["schedule"] = self.profile_schedule
+        profile["seed"] = self.profile.seed
         file_content = dumps(profile, indent=4)
-        self.write_in_file(profile_path, file_content)   
+        self.write_in_file(profile_path, file_content)
 
-    ################################################################ VALIDATORS
-
-    # PROFILES
     @log_calls
     def validate_new_profile(self, name, icon, event=None):
         name = name.get().lower()
         if (name != "") and (name not in self.profiles.keys()):
             profile = {
                 "icon": icon,
-                "categories": {}
+                "mode": MODE_SAMPLER,
+                "seed": getrandbits(32),
+                "stats": {},
+                "schedule": {}
             }
             file_path = join(PATH_PROFILES, name + ".json")
             file_content = dumps(profile)
@@ -983,34 +2774,81 @@ class Bilingual(Tk):
             global LEARNED_LANGUAGE
             SPOKEN_LANGUAGE = spoken_language
             LEARNED_LANGUAGE = learned_language
-            self.load_profile()
+            if self.profile_stats is None:
+                self.load_profile()
+            else:
+                # The lessons read the stats of the new pair, only the aggregates and the locks are computed again
+                for category in self.categories.values():
+                    category.invalidate()
+                self.check_prerequisites()
             self.display_categories()
 
+    @log_calls
+    def toggle_selection_mode(self, event=None):
+        global SELECTION_MODE
+        SELECTION_MODE = MODE_SAMPLER if SELECTION_MODE == MODE_SPACED_REPETITION else MODE_SPACED_REPETITION
+        self.profile.mode = SELECTION_MODE
+        profile_path = join(PATH_PROFILES, self.profile.uid + ".json")
+        profile = loads(self.read_from_file(profile_path))
+        profile["mode"] = SELECTION_MODE
+        self.write_in_file(profile_path, dumps(profile, indent=4))
+        self.display_languages()
+
     # QUESTIONS
     @log_calls
     def validate_response(self, response, event=None):
         self.timer.stop()
-        if self.question.propose(response):
+        # In review, the next question can be of another lesson
+        lesson = self.lesson
+        stars = lesson.stars
+        correct = lesson.propose(self.question, response)
+        if self.review is not None:
+            self.review.update(self.question)
+        else:
+            self.refresh_plan(self.question)
+        # Only the lessons that require this one can change of lock, and only when its stars change
+        if lesson.stars != stars:
+            dependents = self.dependents.get((lesson.category.uid, lesson.uid), [])
+            self.check_prerequisites(dependents)
+            if self.review is not None:
+                self.review.refresh(dependents)
+        if correct:
             self.playsound(SOUND_CORRECT)
             self.display_questions()
         else:
             self.playsound(SOUND_INCORRECT)
             self.display_answer(response)
         self.save_profile()
-        self.check_prerequisites()
 
     ################################################################# LISTENERS
 
     # WINDOW
     @log_calls
     def close_app(self, event=None):
+        if DEBUG_MODE:
+            self.report_memory()
         self.remove_temp_files()
+        self.catalog.close()
         self.destroy()
 
     # WIDGET
     @log_calls
     def tell_text(self, text, language, event=None):
-        file_path = join(PATH_TEMPORARY_FILES, "tts.mp3")
+        if isinstance(text, StringVar):
+            text = text.get()
+
+        if text == "":
+            return
+
+        self.playsound(self.get_speech(text, language), False)
+
+    @log_calls
+    def get_speech(self, text, language):
+        # The speeches are kept by text until the app is closed, so a planned question is spoken without waiting
+        file_path = join(PATH_TEMPORARY_FILES, f"tts-{sha1(f'{language}:{text}'.encode(FILES_ENCODING)).hexdigest()}.mp3")
+        if isfile(file_path):
+            return file_path
+
         languages = {
             "english": {
                 "language_code": "en",
@@ -1022,23 +2860,26 @@ class Bilingual(Tk):
             }
         }
 
-        if isinstance(text, StringVar):
-            text = text.get()
-
-        if text == "":
-            return
-
         tts = gTTS(text=text, lang=languages[language]["language_code"], tld=languages[language]["accent_code"])
 
-        if isfile(file_path):
-            remove(file_path)
-
-        tts.save(file_path)
-
-        while not isfile(file_path):
-            sleep(0.1)
+        # The file appears complete, even when the same speech is generated in the background
+        temporary_path = f"{file_path}.{get_ident()}"
+        tts.save(temporary_path)
+        replace(temporary_path, file_path)
+        return file_path
 
-        self.playsound(file_path, False)
+    @log_calls
+    def prefetch_speeches(self, speeches):
+        for text, language in speeches:
+            # A speech planned twice is generated once, a speech that failed is tried again when it is planned again
+            if (text, language) in self.prefetched_speeches:
+                continue
+            self.prefetched_speeches.add((text, language))
+            try:
+                self.get_speech(text, language)
+            except Exception as error:
+                self.prefetched_speeches.discard((text, language))
+                print(f"Warning : The speech of {text[:15]}... could not be prepared ({error}).")
 
     @log_calls
     def click_button(self, action, args=[], sound=SOUND_PAGE_FORWARDS, event=None):
@@ -1396,6 +3237,10 @@ class Bilingual(Tk):
                 self.bind_widget(frame, partial(self.set_window_title, f"From {spoken_language.title()} to {learned_language.title()}"), EVENT_ENTER_WIDGET, recursive=False)
                 self.bind_widget(frame, partial(self.set_window_title, self.title()), EVENT_LEAVE_WIDGET, recursive=False)
 
+        # MODE BUTTON
+        mode_text = "Spaced repetition" if SELECTION_MODE == MODE_SPACED_REPETITION else "Random questions"
+        self.create_button(self.window_container, "next", mode_text, self.toggle_selection_mode, sound=SOUND_POP)
+
         # RETURN BUTTON
         self.create_button(self.window_container, "arrow_left", "Profiles", self.display_profiles, arguments=1, sound=SOUND_PAGE_BACKWARDS)
 
@@ -1426,6 +3271,10 @@ class Bilingual(Tk):
         categories_frame = Frame(self.window_container)
         categories_frame.pack(expand=True, fill=X)
 
+        # REVIEW BUTTON
+        if not all(category.is_locked for category in categories):
+            self.create_button(self.window_container, "arrow_right", "Review everything", self.select_review, image_first=False)
+
         # RETURN BUTTON
         self.create_button(self.window_container, "arrow_left", "Languages", self.display_languages, arguments=1, sound=SOUND_PAGE_BACKWARDS, alone_in_row=(total_pages == 1))
         
@@ -1475,9 +3324,10 @@ class Bilingual(Tk):
         # Iterate through lessons
         for lesson in lessons[start_index:end_index]:
             prerequisites_text = []
-            for category, lessons in self.lessons[lesson.uid].prerequisites.items():
-                for lesson_uid, stars in lessons.items():
-                    prerequisites_text.append(f"{self.lessons[lesson_uid].name} {'⭐' * stars}")
+            for category_uid, required_lessons in lesson.prerequisites.items():
+                for lesson_uid, stars in required_lessons.items():
+                    required_lesson = self.lessons.get((category_uid, lesson_uid))
+                    prerequisites_text.append(f"{required_lesson.name if required_lesson else lesson_uid} {'⭐' * stars}")
             over_title = f"Requirements: " + ", ".join(prerequisites_text)
             self.create_progress_frame(parent=self.window_container, 
                 image=lesson.icon, 
@@ -1503,7 +3353,11 @@ class Bilingual(Tk):
     # QUESTIONS
     @log_calls
     def display_questions(self):
-        self.next_question()
+        # A review whose lessons are all locked or removed ends
+        if not self.next_question():
+            self.review = None
+            self.display_categories()
+            return
 
         # Configure page grid
         self.clear_window()
@@ -1657,7 +3511,20 @@ class Bilingual(Tk):
 
     @log_calls
     def select_profile(self, profile, event=None):
+        global SELECTION_MODE
         self.profile = profile
+        self.profile_stats = None
+        self.profile_schedule = None
+        SELECTION_MODE = profile.mode
+        # The same seed and the same answers ask the same questions, the profiles saved before the seeds get one
+        if profile.seed is None:
+            profile.seed = getrandbits(32)
+        self.random = Random(profile.seed)
+        for category in self.categories.values():
+            for lesson in category.lessons.values():
+                lesson.unload()
+                lesson.clear_stats()
+        self.residency.clear()
         self.display_languages()
     
     # CATEGORIES
@@ -1673,27 +3540,106 @@ class Bilingual(Tk):
     # LESSONS
     @log_calls
     def select_lesson(self, lesson, event=None):
+        self.review = None
         self.lesson = lesson
         self.last_lesson_stars = self.lesson.stars
+        self.plan = deque(self.lesson.plan_questions(PLANNED_QUESTIONS, generator=self.random))
+        self.prepare_questions(self.plan)
         self.display_questions()
 
+    # PLAN
     @log_calls
-    def check_prerequisites(self):
-        for category in self.categories.values():
-            for lesson in category.lessons.values():
-                lesson.is_locked = False
-                for req_category_id in lesson.prerequisites:
-                    for req_lesson_id, required_stars in lesson.prerequisites[req_category_id].items():
-                        if self.categories[req_category_id].lessons[req_lesson_id].stars < required_stars:
-                            lesson.is_locked = True
-                            break
-                    if lesson.is_locked:
+    def fill_plan(self):
+        if len(self.plan) > PLAN_REFILL:
+            return
+        planned = self.lesson.plan_questions(PLANNED_QUESTIONS - len(self.plan), self.plan, self.random)
+        self.plan.extend(planned)
+        self.prepare_questions(planned)
+
+    @log_calls
+    def refresh_plan(self, question):
+        # Only the answered question changed of weight or due time, the questions planned before it stay
+        for index, planned_question in enumerate(self.plan):
+            if planned_question.position == question.position:
+                for _ in range(len(self.plan) - index):
+                    self.plan.pop()
+                break
+        self.fill_plan()
+
+    @log_calls
+    def prepare_questions(self, questions):
+        for question in questions:
+            self.get_question_explainations(question)
+        if PREFETCH_SPEECH and questions:
+            speeches = [(question.sentence.capitalize(), SPOKEN_LANGUAGE) for question in questions]
+            speeches += [(question.answer.capitalize(), LEARNED_LANGUAGE) for question in questions]
+            Thread(target=self.prefetch_speeches, args=(speeches,), daemon=True).start()
+
+    # REVIEW
+    @log_calls
+    def create_review(self):
+        # Reading the count of a lesson loads it once, its stats stay when it is unloaded
+        lessons = [lesson for lesson in self.lessons.values() if not lesson.is_locked]
+        return ReviewQueue(lessons, self.question if self.review is not None else None, self.random)
+
+    @log_calls
+    def select_review(self, event=None):
+        self.plan.clear()
+        self.review = self.create_review()
+        if len(self.review) == 0:
+            self.review = None
+            self.display_categories()
+            return
+        self.display_questions()
+
+    @log_calls
+    def check_prerequisites(self, lessons=None):
+        if lessons is None:
+            lessons = self.lessons.values()
+        for lesson in lessons:
+            is_locked = False
+            for req_category_id in lesson.prerequisites:
+                for req_lesson_id, required_stars in lesson.prerequisites[req_category_id].items():
+                    required_lesson = self.lessons.get((req_category_id, req_lesson_id))
+                    # A removed lesson can never be completed
+                    if (required_lesson is None) or (required_lesson.stars < required_stars):
+                        is_locked = True
                         break
+                if is_locked:
+                    break
+            lesson.is_locked = is_locked
 
     # QUESTIONS
     @log_calls
     def next_question(self):
-        self.question = self.category.next_question()
+        if self.review is None:
+            if not self.plan:
+                self.fill_plan()
+            self.question = self.plan.popleft() if self.plan else self.category.next_question(self.random)
+            self.lesson.question = self.question
+            self.fill_plan()
+        else:
+            question = self.review.next_question()
+            if question is None:
+                return False
+            self.question = question
+            if self.question.lesson is not self.lesson:
+                self.category = self.question.lesson.category
+                self.lesson = self.question.lesson
+                self.last_lesson_stars = self.lesson.stars
+        self.residency.touch(self.lesson)
+        return True
+
+    # MEMORY
+    @log_calls
+    def report_memory(self):
+        print("Memory saved by sharing the duplicated strings of the loaded questions:")
+        categories_saved_bytes = self.strings.saved_bytes((lesson.category.uid, lesson.get_strings()) for lesson in self.lessons.values() if lesson.is_loaded)
+        for category_uid, saved_bytes in sorted(categories_saved_bytes.items()):
+            print(f"    {category_uid}: {saved_bytes / 1024:.1f} KiB")
+        print(f"    Total: {sum(categories_saved_bytes.values()) / 1024:.1f} KiB")
+        resident_lessons = [lesson for lesson in self.residency.lessons if lesson.is_loaded]
+        print(f"Resident lessons: {len(resident_lessons)} / {self.residency.budget or 'no limit'}, {sum(lesson.count for lesson in resident_lessons)} questions")
 
     # DIFFERENCES
     @log_calls
@@ -1721,7 +3667,250 @@ class Bilingual(Tk):
         text_widget.pack(side=LEFT, expand=True, fill=X, padx=5, pady=5)
         text_widget.configure(state="disabled")
 
+#################################################################### BENCHMARKS
+
+def unslotted(cls, removed_fields=()):
+    # The same class, with the per-instance __dict__ and the never read fields the model classes had before their __slots__
+    members = {key: value for key, value in vars(cls).items() if key not in ["__slots__", *cls.__slots__]}
+    init = cls.__init__
+
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        for field in removed_fields:
+            setattr(self, field, None)
+
+    members["__init__"] = __init__
+    return type(cls.__name__, (), members)
+
+def create_synthetic_catalog(classes, categories_count, lessons_count, questions_count):
+    language_class, question_class, lesson_class, category_class = classes
+    categories = []
+    for category_index in range(categories_count):
+        category = category_class(uid=f"category-{category_index}", name=f"Category {category_index}", icon=DEFAULT_ICON)
+        for lesson_index in range(lessons_count):
+            lesson = lesson_class(uid=f"lesson-{lesson_index}", name={SPOKEN_LANGUAGE: f"Lesson {lesson_index}"}, icon=DEFAULT_ICON, prerequisites={})
+            for question_index in range(questions_count):
+                question = question_class(uid=str(question_index))
+                question.add_language(language_class(name=SPOKEN_LANGUAGE, sentence=f"Sentence {question_index}"))
+                question.add_language(language_class(name=LEARNED_LANGUAGE, sentence=f"Phrase {question_index}"))
+                lesson.add_question(question)
+            category.add_lesson(lesson)
+        categories.append(category)
+    return categories
+
+def benchmark_memory(categories_count=10, lessons_count=50, questions_count=500):
+    removed_fields = {
+        Language: ["_success", "_tries"],
+        Question: ["_sentence", "_answer", "_hints", "_success", "_tries"],
+        Lesson: ["_progress", "_success", "_stars"],
+        Category: ["_stars"]
+    }
+    layouts = {
+        "__dict__ and the removed fields": [unslotted(cls, removed_fields[cls]) for cls in [Language, Question, Lesson, Category]],
+        "__dict__": [unslotted(cls) for cls in [Language, Question, Lesson, Category]],
+        "__slots__": [Language, Question, Lesson, Category]
+    }
+    questions_total = categories_count * lessons_count * questions_count
+    print(f"Memory of a synthetic catalog of {questions_total} questions ({questions_total * 2} languages):")
+    for layout, classes in layouts.items():
+        collect()
+        start_tracing()
+        catalog = create_synthetic_catalog(classes, categories_count, lessons_count, questions_count)
+        size = get_traced_memory()[0]
+        stop_tracing()
+        del catalog
+        print(f"    {layout}: {size / 1024 / 1024:.1f} MiB")
+
+#################################################################### SIMULATION
+
+# The chance of a simulated learner to answer a question right
+ACCURACY_MODELS = {
+    "constant": lambda skill, tries, difficulty: skill, # The same chance for every question
+    "learning": lambda skill, tries, difficulty: 1 - (1 - skill) * 0.8 ** tries, # Each try of a question makes it easier
+    "uneven": lambda skill, tries, difficulty: skill ** (2 * difficulty) # Some questions are much harder than the others
+}
+
+def simulate_learner(run):
+    global SELECTION_MODE
+    mode, model, steps, seed, batch = run
+    SELECTION_MODE = mode
+    generator = Random(seed)
+    accuracy = ACCURACY_MODELS[model]
+
+    # The batched runs answer the planned questions in turn, and plan the next ones when they are all answered
+    planned = deque()
+    def next_question(now):
+        if batch == 1:
+            return lesson.next_question(generator, now)
+        if not planned:
+            planned.extend(lesson.plan_questions(batch, generator=generator, now=now))
+        lesson.question = planned.popleft()
+        return lesson.question
+
+    # The memory of the lesson and of its scheduler, built by the first pick
+    collect()
+    start_tracing()
+    category = create_synthetic_catalog([Language, Question, Lesson, Category], 1, 1, SIMULATION_QUESTIONS)[0]
+    lesson = next(iter(category.lessons.values()))
+    difficulties = [generator.random() for _ in range(lesson.count)]
+    question = next_question(0)
+    memory = get_traced_memory()[1]
+    stop_tracing()
+
+    stats = lesson.stats
+    stars_steps = [None] * len(VALUE_STARS)
+    # The answers between a wrong answer and the next time the question is asked
+    missed_steps = {}
+    relearning_steps = []
+    start = perf_counter()
+    for step in range(1, steps + 1):
+        position = question.position
+        if position in missed_steps:
+            relearning_steps.append(step - missed_steps.pop(position))
+        correct = generator.random() < accuracy(SIMULATION_SKILL, stats.tries(position), difficulties[position])
+        lesson.propose(question, question.answer if correct else "", step * SIMULATED_ANSWER_TIME)
+        if not correct:
+            missed_steps[position] = step
+        stars = lesson.stars
+        if stars and (stars_steps[stars - 1] is None):
+            for index in range(stars):
+                stars_steps[index] = stars_steps[index] or step
+        question = next_question(step * SIMULATED_ANSWER_TIME)
+    duration = perf_counter() - start
+
+    return {
+        "mode": mode,
+        "model": model,
+        "batch": batch,
+        "picks_per_second": steps / duration,
+        "memory": memory,
+        "relearning_steps": sum(relearning_steps) / len(relearning_steps) if relearning_steps else None,
+        "stars_steps": stars_steps
+    }
+
+def simulate(steps=100000, seed=0):
+    runs = [(mode, model, steps, seed, 1) for mode in [MODE_SAMPLER, MODE_SPACED_REPETITION] for model in ACCURACY_MODELS.keys()]
+    # The sampler draws the batches in one pass, the order of the spaced repetition changes with each answer
+    runs += [(MODE_SAMPLER, model, steps, seed, SIMULATION_BATCH) for model in ACCURACY_MODELS.keys()]
+    print(f"Simulation of {steps} answers on a lesson of {SIMULATION_QUESTIONS} questions:")
+    # Each run is independent, so they are spread across processes
+    with ProcessPoolExecutor(min(len(runs), LOADING_WORKERS)) as executor:
+        for result in executor.map(simulate_learner, runs):
+            stars_text = []
+            for index, step in enumerate(result["stars_steps"]):
+                if step is None:
+                    stars_text.append(f"{'⭐' * (index + 1)} never")
+                else:
+                    stars_text.append(f"{'⭐' * (index + 1)} after {step} answers ({step * SIMULATED_ANSWER_TIME / 3600:.1f} h)")
+            relearning_text = "never missed" if result["relearning_steps"] is None else f"missed questions asked again after {result['relearning_steps']:.0f} answers"
+            batch_text = f" / batches of {result['batch']}" if result["batch"] > 1 else ""
+            print(f"    {result['mode']} / {result['model']}{batch_text}: {result['picks_per_second']:.0f} picks/s, {result['memory'] / 1024 / 1024:.1f} MiB, {relearning_text}, {', '.join(stars_text)}")
+
+##################################################################### DASHBOARD
+
+def read_records(headers_only=False):
+    file_paths = find_lessons(PATH_CATEGORIES)
+    if USE_CATALOG:
+        catalog = Catalog(join(PATH_CACHE, FILE_CATALOG))
+        catalog.update(file_paths)
+        yield from catalog.lessons()
+        catalog.close()
+    else:
+        yield from read_lessons(file_paths, headers_only)
+
+def read_questions_uids():
+    questions_uids = {}
+    for record in read_records():
+        if record["category"] not in questions_uids.keys():
+            questions_uids[record["category"]] = {}
+        questions_uids[record["category"]][record["uid"]] = [uid for uid, _ in record["questions"]]
+    return questions_uids
+
+def read_profiles_stats(pair_key):
+    profiles_stats = {}
+    for file_path in sorted(find_files(PATH_PROFILES, ".json")):
+        with open(file_path, 'r', encoding=FILES_ENCODING) as file:
+            profile_stats = read_profile_stats(load(file), [split_pair(pair_key)[0]])
+        profiles_stats[basename(file_path).replace(".json", "")] = profile_stats.get(pair_key, {})
+    return profiles_stats
+
+def print_dashboard(pair_key=join_pair(SPOKEN_LANGUAGE, LEARNED_LANGUAGE)):
+    if numpy is None:
+        print("Error : The dashboard requires NumPy (pip install numpy).")
+        exit()
+    if len(split_pair(pair_key)) != 2:
+        print(f"Error : {pair_key} is not a pair of languages, like {join_pair(SPOKEN_LANGUAGE, LEARNED_LANGUAGE)}.")
+        exit()
+    matrix = StatsMatrix(read_questions_uids(), read_profiles_stats(pair_key))
+    values = matrix.reduce()
+    for row, profile_uid in enumerate(matrix.profiles):
+        print(f"{profile_uid.title()} ({pair_key}):")
+        category_column = -1
+        for lesson_column, (category_uid, lesson_uid) in enumerate(matrix.lessons):
+            # The lessons of a category follow each other, in the order of the categories
+            if (category_column < 0) or (matrix.categories[category_column] != category_uid):
+                category_column += 1
+                progress = values["categories"]["progress"][row, category_column]
+                success = values["categories"]["success"][row, category_column]
+                stars = values["categories"]["stars"][row, category_column]
+                print(f"    {category_uid}: {ceil(progress * 100)}% seen, {ceil(success * 100)}% success, {stars} stars")
+            progress = values["lessons"]["progress"][row, lesson_column]
+            success = values["lessons"]["success"][row, lesson_column]
+            stars = values["lessons"]["stars"][row, lesson_column]
+            print(f"        {lesson_uid}: {ceil(progress * 100)}% seen, {ceil(success * 100)}% success, {stars} stars")
+
+###################################################################### PROFILES
+
+def merge_profiles(file_paths):
+    # The older profiles have their stats by learned language only, they are used for every spoken language of the lessons
+    languages = set()
+    for record in read_records(headers_only=True):
+        languages.update(record["languages"] or [])
+
+    merged_profile = None
+    merged_stats = {}
+    merged_schedule = {}
+    for file_path in file_paths:
+        with open(file_path, 'r', encoding=FILES_ENCODING) as file:
+            try:
+                profile = load(file)
+            except JSONDecodeError:
+                print(f"Error decoding JSON in {file_path}")
+                exit()
+        merge_stats(merged_stats, read_profile_stats(profile, languages))
+        merge_schedule(merged_schedule, profile.get("schedule", {}))
+        if merged_profile is None:
+            merged_profile = profile
+
+    merged_profile.pop("categories", None)
+    merged_profile["stats"] = merged_stats
+    merged_profile["schedule"] = merged_schedule
+    with open(file_paths[0], 'w', encoding=FILES_ENCODING) as file:
+        file.write(dumps(merged_profile, indent=4))
+    print(f"Merged {len(file_paths)} profiles into {file_paths[0]}")
+
 ##################################################################### MAIN CODE
 
 if __name__ == "__main__":
-    Bilingual().mainloop()
\ No newline at end of file
+    parser = ArgumentParser()
+    parser.add_argument("--build-catalog", action="store_true", help="compile the lessons into the catalog, then exit")
+    parser.add_argument("--benchmark-memory", action="store_true", help="compare the memory used by the model classes with and without __slots__, then exit")
+    parser.add_argument("--merge-profiles", nargs="+", metavar="PROFILE", help="merge the stats of the same profile saved on several devices into the first file, then exit")
+    parser.add_argument("--simulate", nargs="?", type=int, const=100000, metavar="STEPS", help="simulate learners answering a synthetic lesson with each scheduler, and print their speed, memory and stars, then exit")
+    parser.add_argument("--dashboard", nargs="?", const=join_pair(SPOKEN_LANGUAGE, LEARNED_LANGUAGE), metavar="SPOKEN>LEARNED", help="print the progress, success and stars of every profile for a pair of languages, then exit")
+    arguments = parser.parse_args()
+
+    if arguments.build_catalog:
+        catalog = Catalog(join(PATH_CACHE, FILE_CATALOG))
+        catalog.update(find_lessons(PATH_CATEGORIES))
+        catalog.close()
+    elif arguments.benchmark_memory:
+        benchmark_memory()
+    elif arguments.simulate:
+        simulate(arguments.simulate)
+    elif arguments.dashboard:
+        print_dashboard(arguments.dashboard)
+    elif arguments.merge_profiles:
+        merge_profiles(arguments.merge_profiles)
+    else:
+        Bilingual().mainloop()
\ No newline at end of file